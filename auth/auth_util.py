@@ -1,30 +1,43 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from auth.model import User
+from auth.principal_cache import Principal, principal_cache
 from core.global_constants import ErrorMessage, ErrorKeys
 from core.jwt_utils import verify_access_token
+from core.metrics import time_stage
 from core.utils import response_schema
-from database.session import get_db
+from database.session import AsyncSessionLocal
 
 # Swagger will now show simple "Authorize" for Bearer token
 bearer_scheme = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),db: Session = Depends(get_db)):
+async def _load_principal(user_id: int):
+    with time_stage("auth_principal_load"):
+        async with AsyncSessionLocal() as db:
+            user = await db.scalar(select(User).where(User.id == user_id,User.is_active == True))
+            return Principal.from_user(user) if user else None
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
     token = credentials.credentials
-    user_id = verify_access_token(token,db)
+    user_id = verify_access_token(token)
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-    user = db.query(User).filter(User.id == user_id,User.is_active == True).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+
+    # Cache hit: no database round trip
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = await _load_principal(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        principal_cache.set(user)
     return user
 
 def get_token_from_header(request: Request):
@@ -35,7 +48,7 @@ def get_token_from_header(request: Request):
 
 
 def require_role(role_id: int):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: Principal = Depends(get_current_user)):
         if current_user.role_id != role_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, Boolean, func, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, Boolean, func, String, ForeignKey
 from sqlalchemy.orm import relationship
 
 from database.session import Base
@@ -40,12 +40,12 @@ class User(Base):
     role = relationship("Role", backref="users")
 
 
-class BlacklistedToken(Base):
-    __tablename__ = "blacklisted_tokens"
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(Text, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
-    created = Column(DateTime(timezone=True), server_default=func.now())
-    updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    jti = Column(String(36), unique=True, nullable=False)
+    # Indexed so expired rows can be purged cheaply
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Indexed for the incremental refresh, see core/token_revocation.py
+    created = Column(DateTime(timezone=True), server_default=func.now(), index=True)
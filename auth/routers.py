@@ -1,42 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth_util import get_current_user, get_token_from_header
 from auth.model import User
+from auth.principal_cache import Principal
 from auth.schema import UserResponse, UserSignup, TokenResponse, UserLogin
-from core.jwt_utils import create_access_token, create_refresh_token, verify_access_token, blacklist_token, \
+from core.jwt_utils import create_access_token, create_refresh_token, verify_access_token, revoke_token, \
     verify_refresh_token
-from core.security import hash_password, verify_password
+from core.security import hash_password_async, verify_and_update_password_async
 from core.utils import response_schema
-from database.session import get_db
+from database.session import get_async_db
 from core.global_constants import ErrorMessage, SuccessMessage, GlobalConstants
 
 router = APIRouter()
 
 @router.post("/user-signup", response_model=UserResponse)
-def signup(payload: UserSignup, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == payload.email).first():
+async def signup(payload: UserSignup, db: AsyncSession = Depends(get_async_db)):
+    if await db.scalar(select(User).where(User.email == payload.email)):
         raise HTTPException(400, ErrorMessage.EMAIL_ALREADY_EXISTS.value)
 
     user = User(
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
         first_name=payload.first_name,
         last_name=payload.last_name,
         role_id=GlobalConstants.TEACHER_ROLE_ID
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 @router.post("/login")
-def login(payload: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email,User.is_active == True).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email,User.is_active == True))
+    verified, new_hash = (
+        await verify_and_update_password_async(payload.password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not verified:
         raise HTTPException(status_code=400, detail=ErrorMessage.INVALID_CREDENTIALS.value)
 
+    # Transparent rehash when BCRYPT_ROUNDS changed since the hash was stored
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
     access_token = create_access_token(user.id)
     refresh_token = create_refresh_token(user.id)
     user_response = UserResponse.model_validate(user)
@@ -49,25 +60,25 @@ def login(payload: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/logout")
-def logout(db: Session = Depends(get_db), current_user: User = Depends(get_current_user), token: str = Depends(get_token_from_header)):
+async def logout(db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(get_current_user), token: str = Depends(get_token_from_header)):
 
-    user_id = verify_access_token(token, db)
+    user_id = verify_access_token(token)
     if not user_id:
         raise HTTPException(status_code=401, detail=ErrorMessage.INVALID_TOKEN.value)
-    if blacklist_token(token, db):
+    if await revoke_token(token, db):
         return response_schema({}, SuccessMessage.LOGOUT_SUCCESS.value, status.HTTP_200_OK)
     else:
         raise HTTPException(status_code=400, detail=ErrorMessage.LOGOUT_FAILED.value)
 
 @router.post("/refresh")
-def refresh(refresh_token: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), access_token: str = Depends(get_token_from_header)):
+async def refresh(refresh_token: str, db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(get_current_user), access_token: str = Depends(get_token_from_header)):
     user_id = verify_refresh_token(refresh_token)
     if not user_id:
         raise HTTPException(status_code=401, detail=ErrorMessage.INVALID_TOKEN.value)
 
-    # blacklist the old access token if it is not blacklisted
+    # revoke the old access token if it is not revoked
     try:
-        blacklist_token(access_token, db)
+        await revoke_token(access_token, db)
     except:
         pass
 
@@ -82,19 +93,19 @@ def refresh(refresh_token: str, db: Session = Depends(get_db), current_user: Use
 
 
 @router.post("/super-admin-signup", response_model=UserResponse)
-def super_admin_signup(payload: UserSignup, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == payload.email).first():
+async def super_admin_signup(payload: UserSignup, db: AsyncSession = Depends(get_async_db)):
+    if await db.scalar(select(User).where(User.email == payload.email)):
         raise HTTPException(400, ErrorMessage.EMAIL_ALREADY_EXISTS.value)
 
     user = User(
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
         first_name=payload.first_name,
         last_name=payload.last_name,
         role_id=GlobalConstants.SUPERADMIN_ROLE_ID
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
\ No newline at end of file
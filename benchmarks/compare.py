@@ -0,0 +1,61 @@
+"""
+Side by side comparison of two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+import argparse
+import json
+
+
+def _delta(before, after) -> str:
+    if before is None or after is None:
+        return "n/a"
+    if before == 0:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def _row(label: str, metric: str, before, after):
+    print(f"  {label:<42} {metric:<14} {str(before):>12} {str(after):>12} {_delta(before, after):>9}")
+
+
+def compare(before: dict, after: dict):
+    print(f"before: {before['meta']['git'].get('commit')}  {before['meta']['started_at']}")
+    print(f"after:  {after['meta']['git'].get('commit')}  {after['meta']['started_at']}\n")
+
+    print("Endpoints")
+    for endpoint, levels in after.get("endpoints", {}).items():
+        before_levels = {level["concurrency"]: level for level in before.get("endpoints", {}).get(endpoint, [])}
+        for level in levels:
+            previous = before_levels.get(level["concurrency"])
+            if previous is None:
+                continue
+            label = f"{endpoint} c={level['concurrency']}"
+            _row(label, "throughput_rps", previous["throughput_rps"], level["throughput_rps"])
+            for metric in ("p50", "p95", "p99"):
+                _row(label, f"{metric}_ms", previous["latency_ms"].get(metric), level["latency_ms"].get(metric))
+            _row(label, "failed", previous["failed"], level["failed"])
+
+    print("\nMicrobenchmarks")
+    for group, cases in after.get("microbenchmarks", {}).items():
+        before_cases = before.get("microbenchmarks", {}).get(group, {})
+        for case, summary in cases.items():
+            previous = before_cases.get(case)
+            if not isinstance(summary, dict) or not isinstance(previous, dict):
+                continue
+            for metric in ("p50", "p95"):
+                _row(f"{group}.{case}", f"{metric}_ms", previous.get(metric), summary.get(metric))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    arguments = parser.parse_args()
+
+    with open(arguments.before, encoding="utf-8") as f:
+        before_report = json.load(f)
+    with open(arguments.after, encoding="utf-8") as f:
+        after_report = json.load(f)
+
+    compare(before_report, after_report)
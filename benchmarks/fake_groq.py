@@ -0,0 +1,193 @@
+"""
+Local stand-in for the Groq (OpenAI compatible) chat completions API.
+
+The app talks to it when GROQ_BASE_URL points here, e.g.
+
+    python -m benchmarks.fake_groq --port 8100 --latency-ms 800 --jitter-ms 200
+    GROQ_BASE_URL=http://127.0.0.1:8100 fastapi dev main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EVALUATION_RESPONSE = {
+    "total_marks": 10,
+    "marks_awarded": 6,
+    "verdict": "Partially correct",
+    "conceptual_accuracy": "The core concept is explained with minor gaps.",
+    "key_points_covered": "Definition and one practical example.",
+    "missing_or_incorrect_points": "Does not cite the relevant standard.",
+    "presentation_feedback": "Well structured, could be more concise.",
+    "examiner_remarks": "Adequate answer that needs more technical depth."
+}
+
+
+def _question_answer_response(prompt: str) -> dict:
+    # Echo part of the input back so the segmentation step has something to work with
+    text = prompt.rsplit("\n\n", 1)[-1].strip()
+    middle = len(text) // 3
+    return {"question": text[:middle], "answer": text[middle:]}
+
+
+def _response_content(messages: list) -> str:
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+
+    # Packed evaluation: one object per <answer id="..."> block
+    answer_ids = re.findall(r'<answer id="([^"]+)">', prompt)
+    if answer_ids:
+        return json.dumps([{"id": answer_id, **EVALUATION_RESPONSE} for answer_id in answer_ids])
+    if "marks_awarded" in prompt:
+        return json.dumps(EVALUATION_RESPONSE)
+    return json.dumps(_question_answer_response(prompt))
+
+
+def _usage(messages: list, content: str) -> dict:
+    # Rough whitespace token counts are enough for throughput accounting
+    prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in messages)
+    completion_tokens = len(content.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def create_app(latency_ms: float, jitter_ms: float, error_rate: float, stream_chunks: int,
+               requests_per_minute: int = 0, slow_rate: float = 0.0, slow_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+    window = {"started": time.monotonic(), "used": 0}
+
+    def rate_limit_headers() -> dict:
+        """Groq style x-ratelimit-* headers for a fixed one minute request window."""
+        if not requests_per_minute:
+            return {}
+        reset = max(0.0, window["started"] + 60 - time.monotonic())
+        return {
+            "x-ratelimit-limit-requests": str(requests_per_minute),
+            "x-ratelimit-remaining-requests": str(max(0, requests_per_minute - window["used"])),
+            "x-ratelimit-reset-requests": f"{reset:.2f}s"
+        }
+
+    def delay_seconds() -> float:
+        delay = max(0.0, random.uniform(latency_ms - jitter_ms, latency_ms + jitter_ms))
+        # A slow provider node: the tail latency hedged requests are meant to cut
+        if random.random() < slow_rate:
+            delay += slow_ms
+        return delay / 1000
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters["requests"] += 1
+
+        if requests_per_minute:
+            if time.monotonic() - window["started"] >= 60:
+                window.update(started=time.monotonic(), used=0)
+            if window["used"] >= requests_per_minute:
+                counters["rate_limited"] += 1
+                headers = rate_limit_headers()
+                headers["retry-after"] = str(max(1, round(window["started"] + 60 - time.monotonic())))
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                    headers=headers
+                )
+            window["used"] += 1
+
+        if random.random() < error_rate:
+            counters["errors"] += 1
+            await asyncio.sleep(delay_seconds() / 4)
+            return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable", "type": "internal_server_error"}})
+
+        messages = body.get("messages", [])
+        content = _response_content(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay_seconds())
+            return JSONResponse(headers=rate_limit_headers(), content={
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": _usage(messages, content)
+            })
+
+        async def event_stream():
+            # Spread the latency over the chunks, like a model generating tokens
+            total_delay = delay_seconds()
+            chunk_size = max(1, len(content) // stream_chunks)
+
+            for start in range(0, len(content), chunk_size):
+                await asyncio.sleep(total_delay / stream_chunks)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+
+            final_chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            yield f"data: {json.dumps(final_chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream", headers=rate_limit_headers())
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Groq chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=16)
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="Emulate Groq request rate limits (0: off)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests that get --slow-ms extra latency")
+    parser.add_argument("--slow-ms", type=float, default=5000)
+    arguments = parser.parse_args()
+
+    uvicorn.run(
+        create_app(
+            arguments.latency_ms,
+            arguments.jitter_ms,
+            arguments.error_rate,
+            arguments.stream_chunks,
+            arguments.requests_per_minute,
+            arguments.slow_rate,
+            arguments.slow_ms
+        ),
+        host=arguments.host,
+        port=arguments.port,
+        log_level="warning"
+    )
@@ -0,0 +1,116 @@
+"""
+In-process microbenchmarks: image decode / preprocessing, OCR inference and
+parsing of LLM output. Each case reports the same latency summary as the endpoints.
+"""
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fake_groq import EVALUATION_RESPONSE
+
+
+def _time_calls(function, repeats: int) -> list:
+    timings_ms = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings_ms.append((time.perf_counter() - started) * 1000)
+    return timings_ms
+
+
+def _cycle(items: list):
+    state = {"index": 0}
+
+    def next_item():
+        item = items[state["index"] % len(items)]
+        state["index"] += 1
+        return item
+
+    return next_item
+
+
+def bench_decode(pages: list, repeats: int) -> dict:
+    from ocr.preprocess import decode_image, preprocess_image
+
+    next_page = _cycle(pages)
+    return {
+        "decode_image": _time_calls(lambda: decode_image(next_page(), {}), repeats),
+        "preprocess_image": _time_calls(lambda: preprocess_image(next_page(), {}), repeats)
+    }
+
+
+def bench_ocr(pages: list, repeats: int) -> dict:
+    """Runs PaddleOCR in this process with the same settings as a worker."""
+    try:
+        from paddleocr import PaddleOCR
+    except ImportError as e:
+        return {"skipped": f"paddleocr is not installed ({e})"}
+
+    from ocr.ocr_engine import OCR_LANG, OCR_THREADS_PER_WORKER, OCR_USE_ANGLE_CLS
+    from ocr.preprocess import preprocess_image
+
+    started = time.perf_counter()
+    engine = PaddleOCR(use_angle_cls=OCR_USE_ANGLE_CLS, lang=OCR_LANG, cpu_threads=OCR_THREADS_PER_WORKER)
+    construction_ms = (time.perf_counter() - started) * 1000
+
+    arrays = [preprocess_image(page, {}) for page in pages]
+    next_array = _cycle(arrays)
+    engine.ocr(arrays[0])
+
+    return {
+        "model_construction_ms": round(construction_ms, 3),
+        "ocr_page": _time_calls(lambda: engine.ocr(next_array()), repeats)
+    }
+
+
+def bench_json(repeats: int) -> dict:
+    from services.evaluate import parse_evaluation, extract_completed_fields
+    from services.llm import parse_question_answer
+
+    content = json.dumps(EVALUATION_RESPONSE)
+    question_answer = json.dumps({"question": "What is goodwill?", "answer": "Goodwill is " + "x " * 400})
+
+    def incremental_fields():
+        # What the streaming endpoint does on every chunk of a streamed response
+        emitted = set()
+        for end in range(16, len(content) + 16, 16):
+            for field, _ in extract_completed_fields(content[:end], emitted):
+                emitted.add(field)
+
+    # Sub-millisecond cases are timed in blocks of 100 calls
+    def block(function):
+        return lambda: [function() for _ in range(100)]
+
+    return {
+        "parse_evaluation_x100": _time_calls(block(lambda: parse_evaluation(content)), repeats),
+        "parse_question_answer_x100": _time_calls(block(lambda: parse_question_answer(question_answer)), repeats),
+        "extract_completed_fields_stream": _time_calls(incremental_fields, repeats)
+    }
+
+
+def _summarize(results: dict) -> dict:
+    from benchmarks.run import summarize_latencies
+
+    summary = {}
+    for name, value in results.items():
+        summary[name] = summarize_latencies(value) if isinstance(value, list) else value
+    return summary
+
+
+def run_microbenchmarks(pages: list, repeats: int) -> dict:
+    # The services modules build their database engines on import; engines connect
+    # lazily, so a SQLite URL keeps them importable without a database server
+    database_path = os.path.join(tempfile.gettempdir(), "evalca-bench-micro.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{database_path}")
+    os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{database_path}")
+
+    report = {}
+    for group, bench in (
+            ("decode", lambda: bench_decode(pages, repeats)),
+            ("ocr", lambda: bench_ocr(pages, repeats)),
+            ("json", lambda: bench_json(repeats))
+    ):
+        print(f"Microbenchmark: {group}", flush=True)
+        report[group] = _summarize(bench())
+    return report
@@ -0,0 +1,396 @@
+"""
+Offline benchmark suite.
+
+Starts the fake Groq server and the API (uvicorn, SQLite database) as subprocesses,
+drives each endpoint at several concurrency levels, runs the microbenchmarks in
+process and writes everything to one JSON file.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --concurrency 1 8 32 --requests 100 --groq-latency-ms 1200
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ("login", "ocr-question", "ocr-answer", "evaluate", "evaluate-batch", "evaluate-batch-packed")
+
+# Answers per /evaluate/batch request
+BATCH_ANSWERS = 8
+
+BENCH_EMAIL = "benchmark.teacher@example.com"
+BENCH_PASSWORD = "benchmark-password"
+
+QUESTION = "Explain the principles of revenue recognition under Ind AS 115 with an example."
+ANSWER = (
+    "Revenue is recognised when control of goods or services transfers to the customer. "
+    "The five step model identifies the contract, the performance obligations, the transaction price, "
+    "allocates the price and recognises revenue as each obligation is satisfied. For example a software "
+    "licence with one year of support is split into two obligations."
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Linear interpolation between closest ranks, as numpy's default."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_latencies(latencies_ms: list) -> dict:
+    values = sorted(latencies_ms)
+    if not values:
+        return {"count": 0}
+
+    return {
+        "count": len(values),
+        "mean": round(statistics.fmean(values), 3),
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(values[-1], 3)
+    }
+
+
+def bench_environment(workdir: str, groq_port: int, arguments) -> dict:
+    database_path = os.path.join(workdir, "bench.db")
+
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": arguments.database_url or f"sqlite:///{database_path}",
+        "ASYNC_DATABASE_URL": arguments.async_database_url or f"sqlite+aiosqlite:///{database_path}",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+        "GROQ_API_KEY": "benchmark",
+        "SECRET_KEY": env.get("SECRET_KEY", "benchmark-secret"),
+        "MAXIMUM_QUESTION_FILES": env.get("MAXIMUM_QUESTION_FILES", "2"),
+        "MAXIMUM_ANSWER_FILES": str(max(arguments.answer_pages, int(env.get("MAXIMUM_ANSWER_FILES", "5")))),
+        "OCR_CACHE_DIR": os.path.join(workdir, "ocr-cache"),
+        "UPLOAD_TMP_DIR": workdir,
+        "JOB_WORKER_IN_PROCESS": "false",
+        "PYTHONPATH": ROOT
+    })
+    return env
+
+
+def seed_database(env: dict):
+    """Creates the schema and the role rows, in a child interpreter that sees the benchmark environment."""
+    script = (
+        "import csv\n"
+        "from sqlalchemy import text\n"
+        "from database.session import Base, SessionLocal, engine\n"
+        "import auth.model, evaluation.model, jobs.model\n"
+        "if engine.dialect.name == 'sqlite':\n"
+        "    with engine.begin() as connection:\n"
+        "        connection.execute(text('PRAGMA journal_mode=WAL'))\n"
+        "Base.metadata.create_all(bind=engine)\n"
+        "with SessionLocal() as db, open('load_data/roles_rows.csv') as f:\n"
+        "    for row in csv.DictReader(f):\n"
+        "        if db.get(auth.model.Role, int(row['id'])) is None:\n"
+        "            db.add(auth.model.Role(id=int(row['id']), name=row['name'], is_active=True))\n"
+        "    db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True)
+
+
+class Services:
+    """The fake Groq server and the API under test, as child processes."""
+
+    def __init__(self, env: dict, groq_port: int, app_port: int, arguments):
+        self.env = env
+        self.groq_port = groq_port
+        self.app_port = app_port
+        self.arguments = arguments
+        self.processes = []
+
+    def __enter__(self):
+        self.processes.append(subprocess.Popen([
+            sys.executable, "-m", "benchmarks.fake_groq",
+            "--port", str(self.groq_port),
+            "--latency-ms", str(self.arguments.groq_latency_ms),
+            "--jitter-ms", str(self.arguments.groq_jitter_ms),
+            "--slow-rate", str(self.arguments.groq_slow_rate),
+            "--slow-ms", str(self.arguments.groq_slow_ms)
+        ], cwd=ROOT, env=self.env))
+
+        self.processes.append(subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1",
+            "--port", str(self.app_port),
+            "--workers", str(self.arguments.workers),
+            "--log-level", "warning"
+        ], cwd=ROOT, env=self.env))
+        return self
+
+    def __exit__(self, *exc_info):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def wait_for(client: httpx.AsyncClient, url: str, timeout: float, expect_status: int = 200):
+    deadline = time.monotonic() + timeout
+    last = None
+    while time.monotonic() < deadline:
+        try:
+            last = await client.get(url)
+            if last.status_code == expect_status:
+                return last
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    return last
+
+
+def unique_page(page: bytes, index: int) -> bytes:
+    # Decoders stop at the JPEG end marker, so a trailing tag changes the
+    # content hash (no OCR cache hits) without changing the decode work
+    return page + f"bench-{index}".encode()
+
+
+def request_builders(pages: list, answer_pages: int, token: str, reuse_inputs: bool) -> dict:
+    auth_headers = {"Authorization": f"Bearer {token}"}
+
+    def tag(index: int) -> int:
+        return 0 if reuse_inputs else index
+
+    def login(index):
+        return "POST", "/auth/login", {"json": {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}}
+
+    def ocr_question(index):
+        page = unique_page(pages[index % len(pages)], tag(index))
+        return "POST", "/ocr/ocr-question", {
+            "headers": auth_headers,
+            "files": [("files", ("question.jpg", page, "image/jpeg"))]
+        }
+
+    def ocr_answer(index):
+        files = []
+        for offset in range(answer_pages):
+            page = unique_page(pages[(index + offset) % len(pages)], tag(index))
+            files.append(("files", (f"answer-{offset + 1}.jpg", page, "image/jpeg")))
+        return "POST", "/ocr/ocr-answer", {"headers": auth_headers, "files": files}
+
+    def evaluate(index):
+        answer = ANSWER if reuse_inputs else f"{ANSWER} (script {index})"
+        return "POST", "/evaluate/evaluate", {"headers": auth_headers, "json": {"question": QUESTION, "answer": answer}}
+
+    def evaluate_batch(packed: bool):
+        def build(index):
+            answers = [
+                {"id": str(number), "answer": ANSWER if reuse_inputs else f"{ANSWER} (script {index}, answer {number})"}
+                for number in range(BATCH_ANSWERS)
+            ]
+            return "POST", "/evaluate/batch", {
+                "headers": auth_headers,
+                "json": {"question": QUESTION, "answers": answers, "packed": packed}
+            }
+        return build
+
+    return {
+        "login": login,
+        "ocr-question": ocr_question,
+        "ocr-answer": ocr_answer,
+        "evaluate": evaluate,
+        "evaluate-batch": evaluate_batch(False),
+        "evaluate-batch-packed": evaluate_batch(True)
+    }
+
+
+async def run_level(client: httpx.AsyncClient, build_request, concurrency: int, total: int, offset: int) -> dict:
+    """Closed loop: `concurrency` clients each send their next request as soon as the previous one returns."""
+    latencies_ms = []
+    status_codes = {}
+    next_index = 0
+
+    async def client_loop():
+        nonlocal next_index
+
+        while next_index < total:
+            index = offset + next_index
+            next_index += 1
+
+            method, url, kwargs = build_request(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                outcome = str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            status_codes[outcome] = status_codes.get(outcome, 0) + 1
+            if outcome.startswith("2"):
+                latencies_ms.append(elapsed_ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "succeeded": len(latencies_ms),
+        "failed": total - len(latencies_ms),
+        "status_codes": status_codes,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(latencies_ms) / wall_seconds, 3) if wall_seconds else None,
+        "latency_ms": summarize_latencies(latencies_ms)
+    }
+
+
+async def run_endpoints(arguments, base_url: str, pages: list) -> dict:
+    limits = httpx.Limits(max_connections=max(arguments.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=arguments.request_timeout, limits=limits) as client:
+        if (await wait_for(client, "/", 60)) is None:
+            raise RuntimeError("API did not start")
+
+        readiness = await wait_for(client, "/ready", arguments.ready_timeout)
+        readiness = readiness.json() if readiness is not None else None
+
+        await client.post("/auth/user-signup", json={
+            "email": BENCH_EMAIL, "password": BENCH_PASSWORD, "first_name": "Bench", "last_name": "Mark"
+        })
+        login = await client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        body = login.json()
+        # The login route passes its payload as the response message
+        token = next(value for value in (body.get("message"), body.get("data")) if isinstance(value, dict))["access_token"]
+
+        builders = request_builders(pages, arguments.answer_pages, token, arguments.reuse_inputs)
+
+        results = {}
+        offset = 0
+        for endpoint in arguments.endpoints:
+            build_request = builders[endpoint]
+
+            # Warm connections, worker caches and lazy imports before measuring
+            for _ in range(arguments.warmup):
+                method, url, kwargs = build_request(offset)
+                await client.request(method, url, **kwargs)
+                offset += 1
+
+            results[endpoint] = []
+            for concurrency in arguments.concurrency:
+                level = await run_level(client, build_request, concurrency, arguments.requests, offset)
+                offset += arguments.requests
+                results[endpoint].append(level)
+                print(
+                    f"{endpoint:>13} c={concurrency:<3} {level['throughput_rps']} req/s "
+                    f"p50={level['latency_ms'].get('p50')} p95={level['latency_ms'].get('p95')} "
+                    f"p99={level['latency_ms'].get('p99')} failed={level['failed']}",
+                    flush=True
+                )
+
+        return {"readiness": readiness, "endpoints": results}
+
+
+def git_revision() -> dict:
+    def git(*args):
+        completed = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return completed.stdout.strip() if completed.returncode == 0 else None
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=40, help="requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--answer-pages", type=int, default=3)
+    parser.add_argument("--page-pool", type=int, default=8, help="distinct synthetic pages to render")
+    parser.add_argument("--reuse-inputs", action="store_true", help="send identical inputs to measure cache hits")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", default=None, help="sync URL of a local Postgres, SQLite by default")
+    parser.add_argument("--async-database-url", default=None, help="async URL matching --database-url")
+    parser.add_argument("--groq-latency-ms", type=float, default=800)
+    parser.add_argument("--groq-jitter-ms", type=float, default=200)
+    parser.add_argument("--groq-slow-rate", type=float, default=0.0, help="fraction of Groq calls hitting a slow node")
+    parser.add_argument("--groq-slow-ms", type=float, default=5000)
+    parser.add_argument("--request-timeout", type=float, default=300)
+    parser.add_argument("--ready-timeout", type=float, default=180)
+    parser.add_argument("--micro-repeats", type=int, default=20)
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    arguments = parser.parse_args()
+
+    from benchmarks.micro import run_microbenchmarks
+    from benchmarks.synthetic_pages import generate_pages
+
+    random.seed(arguments.seed)
+    started_at = datetime.now(timezone.utc)
+
+    print(f"Rendering {arguments.page_pool} synthetic pages", flush=True)
+    pages = generate_pages(arguments.page_pool, seed=arguments.seed)
+
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "arguments": vars(arguments),
+            "page_bytes": {"mean": round(statistics.fmean(len(page) for page in pages))}
+        }
+    }
+
+    if not arguments.skip_endpoints:
+        workdir = tempfile.mkdtemp(prefix="evalca-bench-")
+        groq_port = _free_port()
+        app_port = _free_port()
+        env = bench_environment(workdir, groq_port, arguments)
+
+        try:
+            seed_database(env)
+            with Services(env, groq_port, app_port, arguments):
+                report.update(asyncio.run(run_endpoints(arguments, f"http://127.0.0.1:{app_port}", pages)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not arguments.skip_micro:
+        report["microbenchmarks"] = run_microbenchmarks(pages, arguments.micro_repeats)
+
+    report["meta"]["duration_seconds"] = round((datetime.now(timezone.utc) - started_at).total_seconds(), 1)
+
+    output = arguments.output or os.path.join(
+        ROOT, "benchmarks", "results", f"{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
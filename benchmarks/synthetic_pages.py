@@ -0,0 +1,78 @@
+"""
+Synthetic handwritten-style answer pages: ruled paper, uneven script text,
+wobbling baselines, ink variation, a slight page rotation, sensor noise and JPEG artifacts.
+Deterministic for a given seed so benchmark runs are comparable.
+"""
+import random
+
+import cv2
+import numpy as np
+
+WORDS = (
+    "the auditor shall obtain sufficient appropriate evidence regarding compliance with "
+    "accounting standards revenue recognition lease liability deferred tax asset depreciation "
+    "working capital cash flow statement materiality internal control going concern "
+    "consolidation goodwill impairment provision contingent liability fair value hedge"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def render_page(seed: int, width: int = 1654, height: int = 2339, lines: int = 22) -> np.ndarray:
+    """Renders one page as a BGR array (A4 at 200 DPI by default)."""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+
+    # Off-white paper with faint ruled lines
+    page = np.full((height, width, 3), (232, 240, 245), dtype=np.uint8)
+    line_gap = (height - 300) // lines
+    for row in range(lines):
+        y = 220 + row * line_gap
+        cv2.line(page, (80, y), (width - 80, y), (214, 200, 190), 2)
+
+    ink = (rng.randint(90, 140), rng.randint(30, 60), rng.randint(10, 40))
+    for row in range(lines):
+        baseline = 210 + row * line_gap
+        x = 100 + rng.randint(0, 40)
+
+        for word in _sentence(rng, rng.randint(5, 9)).split():
+            scale = rng.uniform(1.3, 1.7)
+            thickness = rng.randint(2, 3)
+            # Handwriting drifts off the ruled line word by word
+            y = baseline + rng.randint(-8, 6)
+            (word_width, _), _ = cv2.getTextSize(word, cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, scale, thickness)
+            if x + word_width > width - 90:
+                break
+
+            color = tuple(max(0, min(255, channel + rng.randint(-15, 15))) for channel in ink)
+            cv2.putText(page, word, (x, y), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, scale, color, thickness, cv2.LINE_AA)
+            x += word_width + rng.randint(18, 34)
+
+    # Low frequency warp makes strokes and baselines irregular like handwriting
+    grid_y, grid_x = np.indices((height, width), dtype=np.float32)
+    map_x = grid_x + 2.5 * np.sin(grid_y / rng.uniform(9, 14))
+    map_y = grid_y + 4.0 * np.sin(grid_x / rng.uniform(60, 90))
+    page = cv2.remap(page, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    # Slight skew as if photographed or scanned by hand
+    angle = rng.uniform(-2.5, 2.5)
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    page = cv2.warpAffine(page, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+    page = cv2.GaussianBlur(page, (3, 3), 0)
+    noise = np_rng.normal(0, 6, page.shape)
+    return np.clip(page.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+
+def encode_page(page: np.ndarray, quality: int = 85) -> bytes:
+    ok, encoded = cv2.imencode(".jpg", page, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def generate_pages(count: int, seed: int = 0, **kwargs) -> list:
+    """Returns `count` distinct JPEG encoded pages."""
+    return [encode_page(render_page(seed + index, **kwargs)) for index in range(count)]
@@ -0,0 +1,291 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+from fastapi import status
+from starlette.responses import JSONResponse
+
+from core.global_constants import ErrorKeys, ErrorMessage
+from core.jwt_utils import verify_access_token
+from core.metrics import ADMISSION_ACTIVE, ADMISSION_DECISIONS, ADMISSION_QUEUE_WAIT, ADMISSION_QUEUED
+from core.utils import response_schema
+from services.groq_rate_limits import groq_rate_limits
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+# Longest time a request waits for a slot before it is answered with 503
+ADMISSION_MAX_QUEUE_SECONDS = float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", 10))
+ADMISSION_USER_BUCKETS_MAX = 10000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`. Not thread safe: event loop only."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> float:
+        """Takes one token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def charge(self, amount: float):
+        """Takes `amount` tokens even if that runs the bucket into debt, paid back at `rate`."""
+        self._refill(time.monotonic())
+        self.tokens -= amount
+
+    def give_back(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class AdmissionQueue:
+    """
+    At most `max_active` requests run at once; up to `max_queue` more wait in FIFO order
+    for at most ADMISSION_MAX_QUEUE_SECONDS. A request whose predicted wait is already
+    longer than that is rejected straight away instead of timing out in the queue.
+    """
+
+    def __init__(self, name: str, max_active: int, max_queue: int):
+        self.name = name
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters = deque()
+        # Moving average of how long a request holds its slot, for the wait predictions
+        self._hold_seconds = 1.0
+
+    def expected_wait(self, position: int) -> float:
+        return self._hold_seconds * position / self.max_active
+
+    def _retry_after(self) -> float:
+        return max(1.0, self.expected_wait(len(self._waiters) + 1))
+
+    async def acquire(self):
+        if self.active < self.max_active and not self._waiters:
+            self.active += 1
+            return
+
+        position = len(self._waiters) + 1
+        if position > self.max_queue or self.expected_wait(position) > ADMISSION_MAX_QUEUE_SECONDS:
+            raise AdmissionRejected(status.HTTP_503_SERVICE_UNAVAILABLE, "queue_full", self._retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.labels(self.name).inc()
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(ADMISSION_MAX_QUEUE_SECONDS):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up, pass it on
+                self.release(0.0)
+            if isinstance(e, TimeoutError):
+                raise AdmissionRejected(status.HTTP_503_SERVICE_UNAVAILABLE, "queue_timeout", self._retry_after())
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUED.labels(self.name).dec()
+            ADMISSION_QUEUE_WAIT.labels(self.name).observe(time.perf_counter() - started)
+
+    def release(self, held_seconds: float):
+        if held_seconds:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held_seconds
+
+        # The slot goes straight to the first waiter that is still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionClass:
+    """Per user and global token buckets in front of a bounded queue, for one kind of work."""
+
+    def __init__(self, name: str, user_rate: float, user_burst: float, global_rate: float,
+                 global_burst: float, max_active: int, max_queue: int, upstream_delay=None):
+        self.name = name
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.queue = AdmissionQueue(name, max_active, max_queue)
+        # Returns the seconds an upstream dependency (Groq) is paused for, or 0
+        self.upstream_delay = upstream_delay
+        self._user_buckets = {}
+
+    def _user_bucket(self, user_id: int) -> TokenBucket:
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            if len(self._user_buckets) >= ADMISSION_USER_BUCKETS_MAX:
+                # Full buckets carry no state worth keeping
+                now = time.monotonic()
+                self._user_buckets = {key: value for key, value in self._user_buckets.items() if not value.is_full(now)}
+            bucket = self._user_buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+        return bucket
+
+    async def admit(self, user_id: int):
+        if self.upstream_delay is not None:
+            delay = self.upstream_delay()
+            if delay > ADMISSION_MAX_QUEUE_SECONDS:
+                raise AdmissionRejected(status.HTTP_503_SERVICE_UNAVAILABLE, "upstream_throttled", delay)
+
+        user_bucket = self._user_bucket(user_id)
+        wait = user_bucket.try_take()
+        if wait:
+            raise AdmissionRejected(status.HTTP_429_TOO_MANY_REQUESTS, "user_rate", wait)
+
+        wait = self.global_bucket.try_take()
+        if wait:
+            # Not this user's fault, the request did not run
+            user_bucket.give_back()
+            raise AdmissionRejected(status.HTTP_503_SERVICE_UNAVAILABLE, "global_rate", wait)
+
+        try:
+            await self.queue.acquire()
+        except AdmissionRejected:
+            user_bucket.give_back()
+            raise
+
+
+    def charge_items(self, user_id: int, items: int):
+        """
+        The middleware admits a request as one unit of work before its body is read;
+        a request carrying several items (batch answers, uploaded files) is charged
+        for the others here. The buckets may go into debt, so a large batch still runs
+        but the user's next requests wait until the rate has paid it back.
+        """
+        if not ADMISSION_ENABLED or items <= 1:
+            return
+        self._user_bucket(user_id).charge(items - 1)
+        self.global_bucket.charge(items - 1)
+
+
+def _class_from_env(name: str, prefix: str, defaults: dict, upstream_delay=None) -> AdmissionClass:
+    def setting(key: str) -> float:
+        return float(os.getenv(f"ADMISSION_{prefix}_{key}", defaults[key]))
+
+    return AdmissionClass(
+        name,
+        user_rate=setting("USER_RATE"),
+        user_burst=setting("USER_BURST"),
+        global_rate=setting("GLOBAL_RATE"),
+        global_burst=setting("GLOBAL_BURST"),
+        max_active=int(setting("MAX_ACTIVE")),
+        max_queue=int(setting("MAX_QUEUE")),
+        upstream_delay=upstream_delay
+    )
+
+
+ocr_admission = _class_from_env("ocr", "OCR", {
+    "USER_RATE": 0.5, "USER_BURST": 5, "GLOBAL_RATE": 5, "GLOBAL_BURST": 20, "MAX_ACTIVE": 4, "MAX_QUEUE": 32
+})
+llm_admission = _class_from_env("llm", "LLM", {
+    "USER_RATE": 2, "USER_BURST": 10, "GLOBAL_RATE": 20, "GLOBAL_BURST": 50, "MAX_ACTIVE": 32, "MAX_QUEUE": 128
+}, upstream_delay=groq_rate_limits.max_delay)
+
+# Only the endpoints that run OCR or call the LLM; listings and admin reads
+# under the same prefixes (/evaluate/history, /ocr/cache) are not throttled.
+# The pipeline runs OCR and then the LLM; OCR is the scarcer of the two
+_ROUTE_CLASSES = {
+    ("POST", "/ocr/ocr-question"): ocr_admission,
+    ("POST", "/ocr/ocr-answer"): ocr_admission,
+    ("POST", "/pipeline/scan-to-grade"): ocr_admission,
+    ("POST", "/evaluate/evaluate"): llm_admission,
+    ("POST", "/evaluate/evaluate/stream"): llm_admission,
+    ("POST", "/evaluate/batch"): llm_admission
+}
+
+
+def _admission_class(method: str, path: str):
+    return _ROUTE_CLASSES.get((method, path.rstrip("/") or "/"))
+
+
+def _user_id(headers: list):
+    for name, value in headers:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return verify_access_token(token.strip())
+    return None
+
+
+class AdmissionMiddleware:
+    """
+    Admission control for the OCR and LLM routes, decided before the request body is read.
+    A request over its user's rate gets 429, one that the server cannot take in time gets 503;
+    both carry Retry-After. Admitted requests hold their slot until the response is complete.
+    Unauthenticated requests pass through to be refused by the router.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        admission_class = _admission_class(scope["method"], scope["path"]) if scope["type"] == "http" and ADMISSION_ENABLED else None
+        user_id = _user_id(scope["headers"]) if admission_class is not None else None
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await admission_class.admit(user_id)
+        except AdmissionRejected as e:
+            ADMISSION_DECISIONS.labels(admission_class.name, e.reason).inc()
+            await self._reject(scope, receive, send, e)
+            return
+
+        ADMISSION_DECISIONS.labels(admission_class.name, "admitted").inc()
+        ADMISSION_ACTIVE.labels(admission_class.name).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ADMISSION_ACTIVE.labels(admission_class.name).dec()
+            admission_class.queue.release(time.perf_counter() - started)
+
+    async def _reject(self, scope, receive, send, rejection: AdmissionRejected):
+        message = (
+            ErrorMessage.RATE_LIMITED.value
+            if rejection.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            else ErrorMessage.SERVER_BUSY.value
+        )
+        payload = response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            {ErrorKeys.NON_FIELD_ERROR.value: [message]},
+            rejection.status_code
+        )
+        response = JSONResponse(
+            status_code=rejection.status_code,
+            content=payload,
+            headers={"Retry-After": str(math.ceil(rejection.retry_after))}
+        )
+        await response(scope, receive, send)
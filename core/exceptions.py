@@ -49,5 +49,6 @@ def register_exception_handlers(app: FastAPI):
 
         return JSONResponse(
             status_code=exc.status_code,
-            content=payload
+            content=payload,
+            headers=getattr(exc, "headers", None)
         )
@@ -12,6 +12,8 @@ class SuccessMessage(str, Enum):
     LOGIN_SUCCESS = "Login successful."
     LOGOUT_SUCCESS = "Logout successful."
 
+    JOB_SUBMITTED = "Job submitted successfully."
+
 
 class ErrorMessage(str, Enum):
     """Error messages used across the application."""
@@ -19,10 +21,14 @@ class ErrorMessage(str, Enum):
     BAD_REQUEST = "Bad request."
     NOT_FOUND = "Record not found."
     SOMETHING_WENT_WRONG = "Something went wrong. Please try again later."
+    SERVER_BUSY = "Server is busy. Please try again shortly."
+    RATE_LIMITED = "Too many requests. Please slow down and try again shortly."
     NOT_AUTHORIZED = "You are not authorized to perform this action."
 
     SERVER_MISCONFIGURED = "Server configuration error: missing GROQ_API_KEY."
     ANSWER_GENERATION_FAILED = "We’re having trouble generating an answer. Please try again."
+    LLM_UNAVAILABLE = "The evaluation service is temporarily unavailable. Please try again shortly."
+    INVALID_CURSOR = "Invalid or expired page cursor."
 
     EMAIL_ALREADY_EXISTS = "Email already exists."
     INVALID_CREDENTIALS = "Invalid credentials."
@@ -33,6 +39,18 @@ class ErrorMessage(str, Enum):
 
     MAXIMUM_QUESTION_FILES_ALLOWED = "Maximum 2 files are allowed."
     MAXIMUM_ANSWER_FILES_ALLOWED = "Maximum 5 files are allowed."
+    INVALID_IMAGE = "Could not read the uploaded image."
+    IMAGE_TOO_LARGE = "Image resolution is too large."
+    INVALID_PDF = "Could not read the uploaded PDF."
+    MAXIMUM_PDF_PAGES_ALLOWED = "PDF has too many pages."
+    UPLOAD_TOO_LARGE = "Upload is too large."
+
+    QUESTION_SOURCE_REQUIRED = "Upload question files or choose a segmentation mode."
+
+    DUPLICATE_ANSWER_IDS = "Answer ids must be unique."
+    EMPTY_ANSWER = "Answer must not be empty."
+
+    PROFILER_BUSY = "Another request is being profiled. Please try again shortly."
 
     VALIDATION_FAILED = "Validation failed."
 
@@ -44,3 +62,22 @@ class ErrorKeys(str, Enum):
 class GlobalConstants:
     SUPERADMIN_ROLE_ID = 1
     TEACHER_ROLE_ID = 2
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobKind(str, Enum):
+    OCR_QUESTION = "ocr_question"
+    OCR_ANSWER = "ocr_answer"
+    EVALUATION = "evaluation"
+
+
+class SegmentationMode(str, Enum):
+    NONE = "none"
+    HEURISTIC = "heuristic"
+    LLM = "llm"
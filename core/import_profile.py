@@ -0,0 +1,67 @@
+"""
+Import-time report for the API process, built on `python -X importtime`.
+
+    python -m core.import_profile
+    python -m core.import_profile ocr.routers --top 15
+"""
+import argparse
+import subprocess
+import sys
+
+
+def profile_imports(module: str) -> list:
+    """
+    Imports `module` in a fresh interpreter and returns one
+    (name, depth, self_us, cumulative_us) row per imported module, in import order.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_column, cumulative_column, name_column = line[len("import time:"):].split("|")
+        name = name_column.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_column), int(cumulative_column)))
+
+    return rows
+
+
+def print_report(module: str, top: int):
+    rows = profile_imports(module)
+
+    # Children are printed before their parent; the module's subtree ends at its own row
+    end = next(index for index, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    subtree = rows[start:end + 1]
+    total_us = rows[end][3]
+
+    print(f"import {module}: {total_us / 1000:.1f} ms, {len(subtree)} modules (interpreter startup excluded)\n")
+
+    print("Direct imports by cumulative time")
+    direct = sorted((row for row in subtree if row[1] == 1), key=lambda row: -row[3])
+    for name, _, _, cumulative_us in direct[:top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+    print("\nModules by self time")
+    for name, _, self_us, cumulative_us in sorted(subtree, key=lambda row: -row[2])[:top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}  (cumulative {cumulative_us / 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import time of a module.")
+    parser.add_argument("module", nargs="?", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    arguments = parser.parse_args()
+
+    print_report(arguments.module, arguments.top)
@@ -1,13 +1,16 @@
 # app/jwt_utils.py
 import os
+import uuid
 
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.model import BlacklistedToken
+from auth.model import RevokedToken
+from core.token_revocation import revocation_store
 
 load_dotenv()
 SECRET = os.getenv("SECRET_KEY")
@@ -16,19 +19,20 @@ REFRESH_TOKEN_EXPIRE = 7*24*3600  # 7 days
 
 def create_access_token(user_id: int):
     expire = datetime.utcnow() + timedelta(seconds=ACCESS_TOKEN_EXPIRE)
-    payload = {"sub": str(user_id), "exp": expire}
+    payload = {"sub": str(user_id), "exp": expire, "jti": uuid.uuid4().hex}
     return jwt.encode(payload, SECRET, algorithm="HS256")
 
 def create_refresh_token(user_id: int):
     expire = datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_EXPIRE)
-    payload = {"sub": str(user_id), "exp": expire}
+    payload = {"sub": str(user_id), "exp": expire, "jti": uuid.uuid4().hex}
     return jwt.encode(payload, SECRET, algorithm="HS256")
 
-def verify_access_token(token: str, db: Session):
+def verify_access_token(token: str):
     try:
         payload = jwt.decode(token, SECRET, algorithms=["HS256"])
-        blacklisted = db.query(BlacklistedToken).filter_by(token=token).first()
-        if blacklisted:
+        jti = payload.get("jti")
+        # Tokens issued before jti existed cannot be revoked, so they are refused
+        if not jti or revocation_store.is_revoked(jti):
             return None
         return int(payload.get("sub"))
     except jwt.ExpiredSignatureError:
@@ -36,18 +40,25 @@ def verify_access_token(token: str, db: Session):
     except jwt.InvalidTokenError:
         return None
 
-def blacklist_token(token: str, db: Session):
+async def revoke_token(token: str, db: AsyncSession):
 
     try:
         payload = jwt.decode(token, SECRET, algorithms=["HS256"])
-        exp = datetime.fromtimestamp(payload["exp"])
+        jti = payload.get("jti")
+        if not jti:
+            return None
+        exp = datetime.fromtimestamp(payload["exp"], timezone.utc)
 
-        # Save token to blacklist
-        blacklisted = BlacklistedToken(token=token, expires_at=exp)
-        db.add(blacklisted)
-        db.commit()
+        # Save jti to the revocation store
+        db.add(RevokedToken(jti=jti, expires_at=exp))
+        await db.commit()
+        revocation_store.add(jti, exp)
         return True
 
+    except IntegrityError:
+        # Already revoked
+        await db.rollback()
+        return True
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
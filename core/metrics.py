@@ -0,0 +1,404 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# prometheus_client switches to multiprocess mode when the variable exists at all, even
+# empty (as a blank .env line leaves it); that must be settled before it is imported
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Set when uvicorn runs several workers, see prometheus_client multiprocess mode
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Labels are kept to small fixed sets (route templates, stage names, model ids)
+# so the number of series stays bounded whatever the traffic.
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds",
+    "Time spent in an internal processing stage.",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Groq chat completion latency (time to response headers for streamed calls).",
+    ["model", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported in the Groq usage field.",
+    ["model", "kind"]
+)
+
+LLM_PARSE_FAILURES = Counter(
+    "llm_json_parse_failures_total",
+    "LLM responses that were not valid JSON.",
+    ["operation"]
+)
+
+GROQ_THROTTLE_SECONDS = Counter(
+    "groq_throttle_seconds_total",
+    "Time calls were held back to stay under the Groq rate limits.",
+    ["model"]
+)
+
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "Groq calls retried after a failed attempt, by the failure.",
+    ["model", "reason"]
+)
+
+LLM_HEDGES = Counter(
+    "llm_hedges_total",
+    "Duplicate Groq requests sent once the first one passed the observed p95 (fired), and those that answered first (won).",
+    ["model", "outcome"]
+)
+
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "Groq calls answered by a fallback model instead of the requested one.",
+    ["model", "fallback"]
+)
+
+LLM_CIRCUIT_OPEN = Gauge(
+    "llm_circuit_open",
+    "1 while the circuit breaker for a model is open.",
+    ["model"],
+    multiprocess_mode="max"
+)
+
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "Admission decisions for OCR / LLM requests (admitted or the rejection reason).",
+    ["admission_class", "outcome"]
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time requests spent waiting for an admission slot.",
+    ["admission_class"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+ADMISSION_ACTIVE = Gauge(
+    "admission_active",
+    "Admitted requests currently running.",
+    ["admission_class"],
+    multiprocess_mode="livesum"
+)
+
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Requests waiting for an admission slot.",
+    ["admission_class"],
+    multiprocess_mode="livesum"
+)
+
+EVALUATION_HISTORY_RECORDS = Counter(
+    "evaluation_history_records_total",
+    "Evaluation history records written, dropped because the write queue was full, or lost to a failed write.",
+    ["outcome"]
+)
+
+PACKED_EVALUATION_ITEMS = Counter(
+    "packed_evaluation_items_total",
+    "Answers evaluated through a packed completion (packed) or re-run on their own (rerun).",
+    ["outcome"]
+)
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Calls that started a computation (leader) or joined an identical in-flight one (shared).",
+    ["flight", "role"]
+)
+
+OCR_PENDING_TASKS = Gauge(
+    "ocr_pending_tasks",
+    "OCR tasks submitted to the worker pool and not finished yet.",
+    multiprocess_mode="livesum"
+)
+
+THREADPOOL_IN_USE = Gauge(
+    "threadpool_in_use",
+    "Threads currently busy (anyio: sync routes and dependencies; asyncio: asyncio.to_thread).",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+
+THREADPOOL_CAPACITY = Gauge(
+    "threadpool_capacity",
+    "Maximum number of threads of the pool.",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+
+THREADPOOL_QUEUED = Gauge(
+    "threadpool_queued",
+    "Work items waiting for a free thread.",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+
+
+class MetricsMiddleware:
+    """Observes every HTTP request under its route template, e.g. /jobs/{job_id}."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI stores the matched route in the scope; never label with the raw
+            # path, unknown URLs would create unbounded series
+            route = getattr(scope.get("route"), "path_format", None) or "unmatched"
+            REQUEST_DURATION.labels(
+                scope["method"],
+                route,
+                f"{status_code // 100}xx"
+            ).observe(time.perf_counter() - started)
+
+
+# Per-request {stage: [count, total_seconds]}, only set while a request is profiled
+# (see profiling/middleware.py). Threads started with asyncio.to_thread and tasks
+# copy the context, so they add to the same dict.
+stage_breakdown: ContextVar = ContextVar("stage_breakdown", default=None)
+
+
+def _add_to_breakdown(stage: str, seconds: float):
+    breakdown = stage_breakdown.get()
+    if breakdown is not None:
+        entry = breakdown.setdefault(stage, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+
+@contextmanager
+def time_stage(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.labels(stage).observe(elapsed)
+        _add_to_breakdown(stage, elapsed)
+
+
+def observe_stage_timings(timings: dict):
+    """Records the {"<stage>_ms": value} dicts produced inside the OCR workers."""
+    for key, value_ms in timings.items():
+        stage = key.removesuffix("_ms")
+        STAGE_DURATION.labels(stage).observe(value_ms / 1000)
+        _add_to_breakdown(stage, value_ms / 1000)
+
+
+@contextmanager
+def time_llm_call(model: str):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        # The losing half of a hedged call
+        outcome = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_REQUEST_DURATION.labels(model, outcome).observe(elapsed)
+        _add_to_breakdown("llm", elapsed)
+
+
+# {"model", "prompt_tokens", "completion_tokens"} of the LLM calls made by one request
+# or batch item, only set by callers that record them (see services/evaluation_history.py).
+# Like stage_breakdown, a shared dict so calls made in child tasks add to it.
+llm_usage: ContextVar = ContextVar("llm_usage", default=None)
+
+
+def observe_token_usage(model: str, usage):
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+
+    tracked = llm_usage.get()
+    if tracked is not None:
+        tracked["model"] = model
+        tracked["prompt_tokens"] = tracked.get("prompt_tokens", 0) + prompt_tokens
+        tracked["completion_tokens"] = tracked.get("completion_tokens", 0) + completion_tokens
+
+
+class PoolCollector:
+    """Exports the SQLAlchemy pool snapshots at scrape time instead of on every checkout."""
+
+    def __init__(self, pools: dict):
+        self.pools = pools
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size.", labels=["pool"])
+        in_use = GaugeMetricFamily("db_pool_in_use", "Connections checked out.", labels=["pool"])
+        idle = GaugeMetricFamily("db_pool_idle", "Connections idle in the pool.", labels=["pool"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections opened above pool_size.", labels=["pool"])
+        checkouts = CounterMetricFamily("db_pool_checkouts", "Connection checkouts.", labels=["pool"])
+        timeouts = CounterMetricFamily("db_pool_checkout_timeouts", "Checkouts that timed out.", labels=["pool"])
+        wait = CounterMetricFamily("db_pool_checkout_wait_seconds", "Total time spent waiting for a connection.", labels=["pool"])
+
+        for name, metrics in self.pools.items():
+            snapshot = metrics.snapshot()
+            size.add_metric([name], snapshot["pool_size"])
+            in_use.add_metric([name], snapshot["in_use"])
+            idle.add_metric([name], snapshot["idle"])
+            overflow.add_metric([name], snapshot["overflow"])
+            checkouts.add_metric([name], snapshot["checkouts"])
+            timeouts.add_metric([name], snapshot["checkout_timeouts"])
+            wait.add_metric([name], metrics.total_wait_seconds)
+
+        return [size, in_use, idle, overflow, checkouts, timeouts, wait]
+
+
+# Collectors that only live in this process, also added to the multiprocess registry
+_process_collectors = []
+
+
+def register_pool_metrics(pools: dict):
+    collector = PoolCollector(pools)
+    REGISTRY.register(collector)
+    _process_collectors.append(collector)
+
+
+class CountingThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that counts its own queued and running work for the thread pool
+    gauges, instead of reading the private state of concurrent.futures.
+    """
+
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers)
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self._counts_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        def run():
+            with self._counts_lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counts_lock:
+                    self.running -= 1
+
+        with self._counts_lock:
+            self.queued += 1
+        try:
+            future = super().submit(run)
+        except BaseException:
+            with self._counts_lock:
+                self.queued -= 1
+            raise
+
+        future.add_done_callback(self._forget_cancelled)
+        return future
+
+    def _forget_cancelled(self, future):
+        # Only work that never started can be cancelled
+        if future.cancelled():
+            with self._counts_lock:
+                self.queued -= 1
+
+
+_default_executor = None
+
+
+def start_default_executor():
+    """
+    Gives the running loop a counting default executor (what asyncio.to_thread runs on),
+    sized like the one asyncio would create.
+    """
+    global _default_executor
+
+    _default_executor = CountingThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4))
+    asyncio.get_running_loop().set_default_executor(_default_executor)
+
+
+def _observe_threadpools():
+    """Samples the thread pools of the running event loop; called on every scrape."""
+    from anyio.to_thread import current_default_thread_limiter
+    from ocr.ocr_engine import pending_ocr_tasks
+
+    OCR_PENDING_TASKS.set(pending_ocr_tasks())
+
+    limiter = current_default_thread_limiter()
+    THREADPOOL_IN_USE.labels("anyio").set(limiter.borrowed_tokens)
+    THREADPOOL_CAPACITY.labels("anyio").set(limiter.total_tokens)
+    THREADPOOL_QUEUED.labels("anyio").set(limiter.statistics().tasks_waiting)
+
+    # asyncio.to_thread runs on the loop's default executor, see start_default_executor
+    if _default_executor is not None:
+        THREADPOOL_CAPACITY.labels("asyncio").set(_default_executor.max_workers)
+        THREADPOOL_QUEUED.labels("asyncio").set(_default_executor.queued)
+        THREADPOOL_IN_USE.labels("asyncio").set(_default_executor.running)
+
+
+def render_metrics() -> tuple:
+    """Returns (body, content type) for the /metrics endpoint. Must run on the event loop."""
+    _observe_threadpools()
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Pool snapshots of the worker answering the scrape
+        for collector in _process_collectors:
+            registry.register(collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
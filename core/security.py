@@ -1,6 +1,22 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from core.global_constants import ErrorMessage
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 2))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 64))
+
+# Hashes with a different cost factor are reported by needs_update and rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -8,3 +24,56 @@ def hash_password(password: str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Returns (verified, new_hash); new_hash is None unless the stored hash is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# Dedicated pool so bcrypt never competes with request handling for threadpool slots
+_executor = None
+_pending = 0
+
+
+def start_hashing_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_hashing_executor():
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def _run_hashing(fn, *args):
+    global _pending
+
+    # Running + queued work is bounded; beyond that, fail fast instead of piling up
+    if _pending >= HASH_WORKERS + HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ErrorMessage.SERVER_BUSY.value,
+            headers={"Retry-After": "1"}
+        )
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(start_hashing_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str):
+    return await _run_hashing(hash_password, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    return await _run_hashing(verify_and_update_password, plain_password, hashed_password)
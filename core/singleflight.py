@@ -0,0 +1,57 @@
+import asyncio
+
+from core.metrics import SINGLEFLIGHT_CALLS
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight computation
+    (a double click, a client retry). The computation runs in its own task and is
+    reference counted: a caller that is cancelled only stops waiting, the work is
+    cancelled when the last caller has gone. Nothing is kept once the flight lands;
+    caching results is left to the callers.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights = {}
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, start):
+        """
+        Returns the result of the flight for `key`, starting it with `start()` (a zero
+        argument callable returning a coroutine or a task) if none is running. `start` is
+        called synchronously, so it can take hold of resources owned by the calling request.
+        All callers of one flight receive the same result object, or the same exception.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(start()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.name, "shared").inc()
+
+        flight.waiters += 1
+        try:
+            # shield: cancelling this caller must not cancel the shared task
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is interested any more; later callers start a fresh flight
+                self._forget(key, flight)
+                flight.task.cancel()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from database.session import Base, engine
+from ocr.ocr_engine import warm_up_ocr_workers
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Off when migrations are run separately; readiness then only needs a reachable database
+DB_CREATE_SCHEMA_ON_STARTUP = os.getenv("DB_CREATE_SCHEMA_ON_STARTUP", "true").lower() == "true"
+DB_STARTUP_RETRY_SECONDS = float(os.getenv("DB_STARTUP_RETRY_SECONDS", 5))
+OCR_WARMUP = os.getenv("OCR_WARMUP", "true").lower() == "true"
+OCR_WARMUP_RETRY_SECONDS = float(os.getenv("OCR_WARMUP_RETRY_SECONDS", 5))
+
+_started = time.perf_counter()
+
+
+class Readiness:
+    """
+    Tracks the startup work that must finish before the instance takes traffic.
+    /ready answers 200 only once every component has been marked ready.
+    """
+
+    def __init__(self, components: tuple):
+        self._status = {component: "pending" for component in components}
+        self._errors = {}
+        self._ready_after = {}
+        self._lock = threading.Lock()
+
+    def mark_ready(self, component: str):
+        with self._lock:
+            if self._status[component] != "ready":
+                self._ready_after[component] = round(time.perf_counter() - _started, 2)
+            self._status[component] = "ready"
+            self._errors.pop(component, None)
+
+    def mark_failed(self, component: str, error: str):
+        with self._lock:
+            self._status[component] = "failed"
+            self._errors[component] = error
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            components = {}
+            for component, status in self._status.items():
+                components[component] = {"status": status}
+                if component in self._errors:
+                    components[component]["error"] = self._errors[component]
+                if component in self._ready_after:
+                    components[component]["ready_after_seconds"] = self._ready_after[component]
+
+            return {
+                "ready": all(status == "ready" for status in self._status.values()),
+                "components": components
+            }
+
+
+readiness = Readiness(("database", "ocr", "revocations"))
+
+_startup_tasks = []
+
+
+def _create_schema():
+    # Models register on Base when imported, main.py imports all of them
+    Base.metadata.create_all(bind=engine)
+
+
+def _ping_database():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _prepare_database():
+    """Creates the schema (or just checks connectivity), retrying until the database answers."""
+    step = _create_schema if DB_CREATE_SCHEMA_ON_STARTUP else _ping_database
+
+    while True:
+        try:
+            await asyncio.to_thread(step)
+        except Exception as e:
+            logger.warning(f"Database is not ready, retrying in {DB_STARTUP_RETRY_SECONDS}s: {e}")
+            readiness.mark_failed("database", type(e).__name__)
+            await asyncio.sleep(DB_STARTUP_RETRY_SECONDS)
+            continue
+
+        readiness.mark_ready("database")
+        logger.info(f"Database ready after {time.perf_counter() - _started:.2f}s")
+        return
+
+
+async def _warm_up_ocr():
+    """
+    Loads the models in every OCR worker and runs one inference each,
+    so the first real request does not pay for model construction.
+    Until every worker is warm, OCR is reported not ready and the warm-up is retried.
+    """
+    if not OCR_WARMUP:
+        readiness.mark_ready("ocr")
+        return
+
+    while True:
+        try:
+            warmups = await warm_up_ocr_workers()
+        except Exception as e:
+            logger.exception(f"OCR warmup failed, retrying in {OCR_WARMUP_RETRY_SECONDS}s")
+            readiness.mark_failed("ocr", type(e).__name__)
+            await asyncio.sleep(OCR_WARMUP_RETRY_SECONDS)
+            continue
+        break
+
+    readiness.mark_ready("ocr")
+    logger.info(
+        f"OCR warm after {time.perf_counter() - _started:.2f}s "
+        f"({len({pid for pid, _ in warmups})} worker(s), inference {max(ms for _, ms in warmups)}ms)"
+    )
+
+
+def start_startup_tasks():
+    """
+    Runs slow startup work in the background: the app answers liveness checks
+    straight away and reports ready once this has finished.
+    """
+    if _startup_tasks:
+        return
+
+    _startup_tasks.append(asyncio.create_task(_prepare_database()))
+    _startup_tasks.append(asyncio.create_task(_warm_up_ocr()))
+
+
+async def stop_startup_tasks():
+    for task in _startup_tasks:
+        task.cancel()
+    await asyncio.gather(*_startup_tasks, return_exceptions=True)
+    _startup_tasks.clear()
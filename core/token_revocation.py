@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+
+from auth.model import RevokedToken
+from core.startup import readiness
+from database.session import SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", 2))
+REVOCATION_PURGE_SECONDS = float(os.getenv("REVOCATION_PURGE_SECONDS", 600))
+# Rows are re-read this far behind the newest one seen: a revocation whose transaction
+# commits after a newer one (two processes revoking at once) would be skipped otherwise
+REVOCATION_LOOKBACK_SECONDS = float(os.getenv("REVOCATION_LOOKBACK_SECONDS", 60))
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TokenRevocationStore:
+    """
+    In-process TTL set of revoked token jtis, mirrored from the revoked_tokens table.
+
+    Lookups never touch the database. Revocations made by this process are visible
+    immediately; revocations made by other processes are picked up by the incremental
+    refresh (rows created since REVOCATION_LOOKBACK_SECONDS before the newest one seen)
+    within REVOCATION_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # jti -> expiry timestamp
+        self._last_created = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._revoked[jti] = _timestamp(expires_at)
+
+    def refresh(self, db: Session) -> int:
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.created)
+        if self._last_created is not None:
+            query = query.where(
+                RevokedToken.created >= self._last_created - timedelta(seconds=REVOCATION_LOOKBACK_SECONDS)
+            )
+        rows = db.execute(query).all()
+
+        now = time.time()
+        with self._lock:
+            # Rows of the lookback window come back on every refresh, keyed by jti they are no-ops
+            for jti, expires_at, created in rows:
+                expires_ts = _timestamp(expires_at)
+                if expires_ts > now:
+                    self._revoked[jti] = expires_ts
+                if created is not None and (self._last_created is None or created > self._last_created):
+                    self._last_created = created
+        return len(rows)
+
+    def purge(self, db: Session) -> int:
+        """Deletes expired rows (index on expires_at) and drops them from memory."""
+        purged = db.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+        ).rowcount
+        db.commit()
+
+        now = time.time()
+        with self._lock:
+            self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        return purged
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocation_store = TokenRevocationStore()
+
+_sync_task = None
+
+
+def _refresh():
+    with SessionLocal() as db:
+        revocation_store.refresh(db)
+
+
+def _purge():
+    with SessionLocal() as db:
+        purged = revocation_store.purge(db)
+    if purged:
+        logger.info(f"Purged {purged} expired revoked token(s)")
+
+
+async def _sync_revocations():
+    loop = asyncio.get_running_loop()
+    last_purge = None
+
+    while True:
+        try:
+            if last_purge is None or loop.time() - last_purge >= REVOCATION_PURGE_SECONDS:
+                await asyncio.to_thread(_purge)
+                last_purge = loop.time()
+            await asyncio.to_thread(_refresh)
+            # The instance is only ready once the current revocations are loaded
+            readiness.mark_ready("revocations")
+        except Exception:
+            logger.exception("Token revocation sync failed")
+
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+
+
+async def start_revocation_sync():
+    """
+    Loads the current revocations, then keeps them in sync and purges expired rows,
+    all in the background. /ready stays 503 until the first load succeeded.
+    """
+    global _sync_task
+
+    if _sync_task is not None:
+        return
+
+    _sync_task = asyncio.create_task(_sync_revocations())
+
+
+async def stop_revocation_sync():
+    global _sync_task
+
+    if _sync_task is not None:
+        _sync_task.cancel()
+        await asyncio.gather(_sync_task, return_exceptions=True)
+        _sync_task = None
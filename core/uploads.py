@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile, status
+from starlette.formparsers import MultiPartParser
+from starlette.responses import JSONResponse
+
+from core.global_constants import ErrorKeys, ErrorMessage
+from core.utils import response_schema
+
+load_dotenv()
+
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", 20 * 1024 * 1024))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", 100 * 1024 * 1024))
+# Bodies up to this size stay in memory, Starlette rolls larger ones over to a temporary file
+UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", 1024 * 1024))
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_MEMORY_BYTES
+# Where spooled bodies are copied when their file cannot be shared by path (no /proc)
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+# Worker processes open the parent's spooled (already unlinked) file through /proc
+_PROC_FDS = os.path.isdir("/proc/self/fd")
+
+_CHUNK_BYTES = 256 * 1024
+# Enough to sniff the file type (the PDF header may sit anywhere in the first 1024 bytes)
+_HEAD_BYTES = 1024
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=ErrorMessage.UPLOAD_TOO_LARGE.value
+        )
+
+
+class SpooledUpload:
+    """
+    An upload body and its sha256, produced in one pass over the body.
+    Small bodies are kept in memory, larger ones stay in the file Starlette spooled them to,
+    which worker processes open by path and memory-map instead of receiving a pickled copy.
+    `file` is that file when `path` points at it, otherwise `path` is a copy of our own.
+    """
+
+    def __init__(self, filename: str, size: int, sha256: str, head: bytes, content: bytes = None, path: str = None,
+                 file=None):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.head = head
+        self.content = content
+        self.path = path
+        self._file = file
+        # close() removes the spooled file once every retain() has been matched
+        self._references = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, filename: str, content: bytes) -> "SpooledUpload":
+        return cls(
+            filename=filename,
+            size=len(content),
+            sha256=hashlib.sha256(content).hexdigest(),
+            head=bytes(content[:_HEAD_BYTES]),
+            content=content
+        )
+
+    @property
+    def source(self):
+        """What a worker process receives: the bytes, or the path of the spooled file."""
+        return self.path if self.path is not None else self.content
+
+    def read(self) -> bytes:
+        """Blocking when the body is on disk; call through asyncio.to_thread."""
+        if self.path is None:
+            return self.content
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def retain(self) -> "SpooledUpload":
+        """Keeps the body available for work that may outlive the request, e.g. a shared OCR flight."""
+        with self._lock:
+            self._references += 1
+        return self
+
+    def close(self):
+        with self._lock:
+            self._references -= 1
+            if self._references > 0:
+                return
+            path, self.path = self.path, None
+            file, self._file = self._file, None
+
+        if file is not None:
+            file.close()
+        elif path is not None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _copy_to_spool_file(source) -> str:
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_TMP_DIR, delete=False) as spool:
+        try:
+            shutil.copyfileobj(source, spool, _CHUNK_BYTES)
+        except BaseException:
+            spool.close()
+            os.remove(spool.name)
+            raise
+    return spool.name
+
+
+async def spool_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_FILE_BYTES) -> SpooledUpload:
+    """
+    Reads an upload in fixed size chunks, hashing as it goes.
+    Raises UploadTooLarge (413) as soon as the body passes `max_bytes`.
+    A body Starlette has rolled over to disk is not copied: the SpooledUpload takes over its file.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge()
+
+    # Same check as UploadFile itself: anything but an in-memory SpooledTemporaryFile is on disk
+    on_disk = getattr(file.file, "_rolled", True)
+    digest = hashlib.sha256()
+    head = b""
+    buffer = bytearray()
+    size = 0
+
+    await file.seek(0)
+    while chunk := await file.read(_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge()
+
+        digest.update(chunk)
+        if len(head) < _HEAD_BYTES:
+            head += chunk[:_HEAD_BYTES - len(head)]
+        if not on_disk:
+            buffer += chunk
+
+    content = path = spooled = None
+    if not on_disk:
+        content = bytes(buffer)
+    elif _PROC_FDS:
+        # Starlette closes the request's files after the response, but the upload may be
+        # retained longer (see SpooledUpload.retain), so it takes the file and closes it itself
+        spooled, file.file = file.file, io.BytesIO()
+        path = f"/proc/{os.getpid()}/fd/{spooled.fileno()}"
+    else:
+        path = await asyncio.to_thread(_copy_to_spool_file, file.file)
+
+    return SpooledUpload(
+        filename=file.filename,
+        size=size,
+        sha256=digest.hexdigest(),
+        head=head,
+        content=content,
+        path=path,
+        file=spooled
+    )
+
+
+async def spool_uploads(files: list, max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES) -> list:
+    """
+    Spools the files of a request one after another, so at most one chunk per request
+    is in flight, enforcing the per-file and per-request limits.
+    """
+    uploads = []
+    total_bytes = 0
+
+    try:
+        for file in files:
+            upload = await spool_upload(file, min(UPLOAD_MAX_FILE_BYTES, max_request_bytes - total_bytes))
+            uploads.append(upload)
+            total_bytes += upload.size
+    except BaseException:
+        await asyncio.to_thread(close_uploads, uploads)
+        raise
+
+    return uploads
+
+
+def close_uploads(uploads: list):
+    for upload in uploads:
+        upload.close()
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects request bodies larger than `max_bytes` with 413.
+    The declared Content-Length is checked before anything is read,
+    and the bytes actually received are counted, so chunked bodies are bounded too.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Inside FastAPI body parsing this surfaces as a regular 413 HTTPException
+                    raise UploadTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except UploadTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        payload = response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            {ErrorKeys.NON_FIELD_ERROR.value: [ErrorMessage.UPLOAD_TOO_LARGE.value]},
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        response = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content=payload,
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
@@ -1,7 +1,22 @@
+import json
+
+
 def response_schema(message, data, status_code):
 
     return {
         "message": message,
         "data": data,
         "status_code": status_code
-    }
\ No newline at end of file
+    }
+
+
+# Disable proxy buffering so events reach the browser as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def format_sse(event, data):
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Checkout wait statistics for an engine's connection pool,
+    plus the pool's own size / in-use counters at snapshot time.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+        engine.pool.metrics = self
+
+    @property
+    def pool(self):
+        # engine.dispose() replaces the pool
+        return self.engine.pool
+
+    def observe_checkout(self, wait_seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            average_wait = self.total_wait_seconds / self.checkouts if self.checkouts else 0.0
+            return {
+                "pool_size": self.pool.size(),
+                "in_use": self.pool.checkedout(),
+                "idle": self.pool.checkedin(),
+                "overflow": self.pool.overflow(),
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "average_checkout_wait_ms": round(average_wait * 1000, 2),
+                "max_checkout_wait_ms": round(self.max_wait_seconds * 1000, 2)
+            }
+
+
+class _TimedPoolMixin:
+    """
+    Times every checkout, however the connection is asked for (sessions, engine.connect(),
+    async sessions run in a greenlet). Pool events only fire once a connection is handed
+    out, so the wait for a free one is measured around connect() instead.
+    """
+
+    metrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_timeout()
+            raise
+
+        if self.metrics is not None:
+            self.metrics.observe_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, status, Depends
+
+from auth.auth_util import require_role
+from auth.principal_cache import Principal
+from core.global_constants import SuccessMessage, GlobalConstants
+from core.utils import response_schema
+from database.session import pool_metrics, async_pool_metrics
+
+router = APIRouter()
+
+
+@router.get("/pool-stats")
+async def pool_stats(current_user: Principal = Depends(require_role(GlobalConstants.SUPERADMIN_ROLE_ID))):
+    return_data = {
+        "sync_pool": pool_metrics.snapshot(),
+        "async_pool": async_pool_metrics.snapshot()
+    }
+
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        return_data,
+        status.HTTP_200_OK
+    )
@@ -1,8 +1,12 @@
 import os
+
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from database.pool_metrics import PoolMetrics, TimedAsyncAdaptedQueuePool, TimedQueuePool
+
 load_dotenv()
 
 USER = os.getenv("USER")
@@ -11,12 +15,49 @@ HOST = os.getenv("HOST")
 PORT = os.getenv("PORT")
 DBNAME = os.getenv("DBNAME")
 
-DATABASE_URL = f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
+# Full URL overrides are used by the benchmarks to run against SQLite
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or f"postgresql+asyncpg://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
+
+# Connection pool tuning
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# 0 leaves the server default; some poolers reject startup parameters
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+_pool_options = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+_sync_connect_args = {}
+_async_connect_args = {}
+if ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+    _async_connect_args["ssl"] = "require"
+if DB_STATEMENT_TIMEOUT_MS and DATABASE_URL.startswith("postgresql"):
+    _sync_connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+if DB_STATEMENT_TIMEOUT_MS and ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+    _async_connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, connect_args=_sync_connect_args, poolclass=TimedQueuePool, **_pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, connect_args=_async_connect_args, poolclass=TimedAsyncAdaptedQueuePool, **_pool_options
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Every checkout is timed by the pool classes above, sessions or not
+pool_metrics = PoolMetrics(engine)
+async_pool_metrics = PoolMetrics(async_engine.sync_engine)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -24,3 +65,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
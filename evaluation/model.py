@@ -0,0 +1,54 @@
+from sqlalchemy import Column, DateTime, func, String, JSON, Integer, ForeignKey, Text, Float, Index
+
+from database.session import Base
+
+
+class EvaluationCacheEntry(Base):
+    __tablename__ = "evaluation_cache"
+
+    # sha256 of prompt version, model and normalized question/answer
+    key = Column(String(64), primary_key=True)
+
+    result = Column(JSON, nullable=False)
+    model = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    created = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class EvaluationRecord(Base):
+    """One evaluation served to a teacher, written in batches by services/evaluation_history.py."""
+
+    __tablename__ = "evaluation_records"
+
+    id = Column(Integer, primary_key=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # sha256 of the normalized question, to find every answer to the same question
+    question_hash = Column(String(64), nullable=False)
+    question = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    result = Column(JSON, nullable=False)
+
+    # Copied out of result for the history filters
+    verdict = Column(String, nullable=True)
+    marks_awarded = Column(Float, nullable=True)
+    total_marks = Column(Float, nullable=True)
+
+    model = Column(String, nullable=False)
+    latency_ms = Column(Integer, nullable=False)
+    # Null when the request made no LLM call of its own (cache hit, shared or packed evaluation)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+
+    # When the evaluation was served, not when the row was written
+    created = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # History listing: user_id = ? ORDER BY created DESC, id DESC, keyset on (created, id)
+        Index("ix_evaluation_records_user_created_id", "user_id", "created", "id"),
+        # Same listing filtered by verdict
+        Index("ix_evaluation_records_user_verdict_created_id", "user_id", "verdict", "created", "id"),
+        Index("ix_evaluation_records_user_question_created", "user_id", "question_hash", "created"),
+    )
@@ -1,31 +1,44 @@
 import asyncio
 import logging
+import time
+from datetime import datetime
+from typing import Optional
 
 import os
 from dotenv import load_dotenv
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 
 from auth.auth_util import get_current_user, require_role
-from auth.model import User
-from evaluation.schema import EvaluateQuestionAnswer
+from auth.principal_cache import Principal
+from core.admission import llm_admission
+from database.session import get_db
+from evaluation.schema import EvaluateQuestionAnswer, BatchEvaluateQuestionAnswers, EvaluationRecordResponse
 from core.global_constants import ErrorMessage, ErrorKeys, SuccessMessage, GlobalConstants
-from services.evaluate import generate_ca_icmai_evaluation_prompt
-from core.utils import response_schema
+from services.evaluate import generate_ca_icmai_evaluation_prompt_async, stream_ca_icmai_evaluation
+from services.evaluation_history import list_evaluation_records, record_evaluation, track_llm_usage
+from services.packed_evaluation import evaluate_answers_packed
+from core.utils import response_schema, format_sse, SSE_HEADERS
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+EVALUATION_BATCH_CONCURRENCY = int(os.getenv("EVALUATION_BATCH_CONCURRENCY", 8))
+MAXIMUM_BATCH_ANSWERS = int(os.getenv("MAXIMUM_BATCH_ANSWERS", 100))
+EVALUATION_HISTORY_PAGE_SIZE = int(os.getenv("EVALUATION_HISTORY_PAGE_SIZE", 20))
+EVALUATION_HISTORY_MAX_PAGE_SIZE = 100
 
+router = APIRouter()
 
-@router.post("/evaluate")
-async def classify_text(payload: EvaluateQuestionAnswer, current_user: User = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
-    question = payload.question.strip()
-    answer = payload.answer.strip()
 
-    MAX_QUESTION_WORDS = int(os.getenv("MAX_QUESTION_WORDS", 300))
-    MAX_ANSWER_WORDS = int(os.getenv("MAX_ANSWER_WORDS", 700))
+def validate_question_answer(question: str, answer: str):
+    """
+    Returns the 400 response for an invalid question/answer pair, or None if it is valid.
+    """
+    MAX_QUESTION_WORDS = int(os.getenv("MAX_QUESTION_WORDS") or 300)
+    MAX_ANSWER_WORDS = int(os.getenv("MAX_ANSWER_WORDS") or 700)
 
     question_word_count = len(question.split())
     answer_word_count = len(answer.split())
@@ -58,11 +71,207 @@ async def classify_text(payload: EvaluateQuestionAnswer, current_user: User = De
             status.HTTP_400_BAD_REQUEST
         )
 
-    response = await asyncio.to_thread(generate_ca_icmai_evaluation_prompt, question, answer)
+    return None
+
+
+@router.post("/evaluate")
+async def classify_text(payload: EvaluateQuestionAnswer, current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    question = payload.question.strip()
+    answer = payload.answer.strip()
+
+    error_response = validate_question_answer(question, answer)
+    if error_response:
+        return error_response
+
+    usage = track_llm_usage()
+    started = time.perf_counter()
+    response = await generate_ca_icmai_evaluation_prompt_async(question, answer)
     logger.info(f"LLM response: {response}")
+    record_evaluation(current_user.id, question, answer, response, time.perf_counter() - started, usage)
 
     return response_schema(
         SuccessMessage.RECORD_RETRIEVED.value,
         response,
         status.HTTP_200_OK
     )
+
+
+@router.post("/evaluate/stream")
+async def classify_text_stream(payload: EvaluateQuestionAnswer, current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    """
+    Same evaluation as /evaluate, streamed as Server-Sent Events:
+    one `field` event per output field as soon as it can be parsed,
+    then a `result` event carrying the validated dict.
+    """
+    question = payload.question.strip()
+    answer = payload.answer.strip()
+
+    error_response = validate_question_answer(question, answer)
+    if error_response:
+        return error_response
+
+    async def event_stream():
+        usage = track_llm_usage()
+        started = time.perf_counter()
+        try:
+            async for event, data in stream_ca_icmai_evaluation(question, answer):
+                if event == "result":
+                    logger.info(f"LLM response: {data}")
+                    record_evaluation(current_user.id, question, answer, data, time.perf_counter() - started, usage)
+                yield format_sse(event, data)
+        except Exception:
+            logger.exception("Streaming evaluation failed")
+            yield format_sse("error", {ErrorKeys.NON_FIELD_ERROR.value: ErrorMessage.ANSWER_GENERATION_FAILED.value})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/batch")
+async def evaluate_batch(payload: BatchEvaluateQuestionAnswers, current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    question = payload.question.strip()
+
+    MAX_QUESTION_WORDS = int(os.getenv("MAX_QUESTION_WORDS") or 300)
+    MAX_ANSWER_WORDS = int(os.getenv("MAX_ANSWER_WORDS") or 700)
+
+    if not question or len(question.split()) > MAX_QUESTION_WORDS:
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: f"Question must be non-empty and at most {MAX_QUESTION_WORDS} words."
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    if not payload.answers or len(payload.answers) > MAXIMUM_BATCH_ANSWERS:
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: f"Between 1 and {MAXIMUM_BATCH_ANSWERS} answers are allowed per batch."
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    if len({item.id for item in payload.answers}) != len(payload.answers):
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: ErrorMessage.DUPLICATE_ANSWER_IDS.value
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    # Per item validation, a bad answer only fails its own entry
+    answers = {item.id: item.answer.strip() for item in payload.answers}
+    item_errors = {}
+    for item_id, answer in answers.items():
+        if not answer:
+            item_errors[item_id] = ErrorMessage.EMPTY_ANSWER.value
+        elif len(answer.split()) > MAX_ANSWER_WORDS:
+            item_errors[item_id] = f"Answer exceeds {MAX_ANSWER_WORDS} words."
+
+    valid_ids = [item.id for item in payload.answers if item.id not in item_errors]
+    # Every answer counts against the user's evaluation rate, not just the request
+    llm_admission.charge_items(current_user.id, len(valid_ids))
+
+    if payload.packed:
+        started = time.perf_counter()
+        evaluations = dict(zip(
+            valid_ids,
+            await evaluate_answers_packed(question, [answers[item_id] for item_id in valid_ids], EVALUATION_BATCH_CONCURRENCY)
+        ))
+        # Packed completions are shared between answers, their tokens are not split per record
+        for item_id, evaluation in evaluations.items():
+            if not isinstance(evaluation, Exception):
+                record_evaluation(current_user.id, question, answers[item_id], evaluation, time.perf_counter() - started)
+    else:
+        semaphore = asyncio.Semaphore(EVALUATION_BATCH_CONCURRENCY)
+
+        async def evaluate_item(item_id):
+            async with semaphore:
+                # Each item runs in its own task, so it collects its own token usage
+                usage = track_llm_usage()
+                started = time.perf_counter()
+                try:
+                    evaluation = await generate_ca_icmai_evaluation_prompt_async(question, answers[item_id])
+                except Exception as e:
+                    logger.exception(f"Batch evaluation failed for answer {item_id}")
+                    return e
+                record_evaluation(current_user.id, question, answers[item_id], evaluation, time.perf_counter() - started, usage)
+                return evaluation
+
+        evaluations = dict(zip(valid_ids, await asyncio.gather(*(evaluate_item(item_id) for item_id in valid_ids))))
+
+    results = []
+    for item in payload.answers:
+        if item.id in item_errors:
+            results.append({"id": item.id, "status": "error", "error": item_errors[item.id]})
+        elif isinstance(evaluations[item.id], Exception):
+            results.append({"id": item.id, "status": "error", "error": ErrorMessage.ANSWER_GENERATION_FAILED.value})
+        else:
+            results.append({"id": item.id, "status": "ok", "result": evaluations[item.id]})
+
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+
+    final_result = {
+        "results": results,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }
+
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        final_result,
+        status.HTTP_200_OK
+    )
+
+
+@router.get("/history")
+def evaluation_history(
+        cursor: Optional[str] = None,
+        limit: int = Query(EVALUATION_HISTORY_PAGE_SIZE, ge=1, le=EVALUATION_HISTORY_MAX_PAGE_SIZE),
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        verdict: Optional[str] = None,
+        min_marks: Optional[float] = None,
+        max_marks: Optional[float] = None,
+        question_hash: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))
+):
+    """
+    The teacher's own evaluations, newest first. Pass the returned `next_cursor` back as
+    `cursor` for the next page; it is null on the last one. `created_to` is exclusive.
+    """
+    try:
+        records, next_cursor = list_evaluation_records(
+            db,
+            current_user.id,
+            limit,
+            cursor=cursor,
+            created_from=created_from,
+            created_to=created_to,
+            verdict=verdict,
+            min_marks=min_marks,
+            max_marks=max_marks,
+            question_hash=question_hash
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=ErrorMessage.INVALID_CURSOR.value)
+
+    return_data = {
+        "results": [EvaluationRecordResponse.model_validate(record).model_dump(mode="json") for record in records],
+        "next_cursor": next_cursor
+    }
+
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        return_data,
+        status.HTTP_200_OK
+    )
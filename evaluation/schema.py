@@ -1,6 +1,41 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
 from pydantic import BaseModel
 
 
 class EvaluateQuestionAnswer(BaseModel):
     question: str
-    answer: str
\ No newline at end of file
+    answer: str
+
+
+class BatchAnswer(BaseModel):
+    id: str
+    answer: str
+
+
+class BatchEvaluateQuestionAnswers(BaseModel):
+    question: str
+    answers: List[BatchAnswer]
+    # Evaluate several answers per LLM completion, see services/packed_evaluation.py
+    packed: bool = False
+
+
+class EvaluationRecordResponse(BaseModel):
+    id: int
+    question_hash: str
+    question: str
+    answer: str
+    result: Any
+    verdict: Optional[str] = None
+    marks_awarded: Optional[float] = None
+    total_marks: Optional[float] = None
+    model: str
+    latency_ms: int
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    created: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, DateTime, func, String, Text, ForeignKey, JSON, LargeBinary, Index
+from sqlalchemy.orm import relationship
+
+from core.global_constants import JobStatus
+from database.session import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # see JobKind
+    status = Column(String, nullable=False, default=JobStatus.QUEUED.value)  # see JobStatus
+
+    payload = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Retry bookkeeping
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # Lease held by the worker currently running the job
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+
+    created = Column(DateTime(timezone=True), server_default=func.now())
+    updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    files = relationship("JobFile", backref="job", cascade="all, delete-orphan", order_by="JobFile.position")
+
+    __table_args__ = (
+        # Claim query: status = 'queued' AND run_after <= now() ORDER BY run_after
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+
+class JobFile(Base):
+    __tablename__ = "job_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    position = Column(Integer, nullable=False)
+    filename = Column(String, nullable=True)
+    content = Column(LargeBinary, nullable=False)
+
+    created = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,193 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+
+from core.global_constants import JobStatus
+from jobs.model import Job, JobFile
+
+load_dotenv()
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 5))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", 300))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _snapshot(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "user_id": job.user_id,
+        "kind": job.kind,
+        "status": job.status,
+        "payload": job.payload,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created": job.created,
+        "updated": job.updated
+    }
+
+
+def enqueue_job(db: Session, user_id: int, kind: str, payload: dict, files: list = None) -> dict:
+    """
+    Persists a job (and its uploaded files, as [(filename, bytes), ...]) in the queued state.
+    `files` may be a generator: each file is written and released before the next one is
+    read, so only one of them is held in memory at a time.
+    """
+    job = Job(
+        user_id=user_id,
+        kind=kind,
+        status=JobStatus.QUEUED.value,
+        payload=payload,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_after=_now()
+    )
+    db.add(job)
+    db.flush()
+
+    for position, (filename, content) in enumerate(files or []):
+        job_file = JobFile(job_id=job.id, position=position, filename=filename, content=content)
+        db.add(job_file)
+        db.flush()
+        db.expunge(job_file)
+
+    db.commit()
+    db.refresh(job)
+    return _snapshot(job)
+
+
+def get_job(db: Session, job_id: int, user_id: int):
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
+    return _snapshot(job) if job else None
+
+
+def claim_job(db: Session, worker_id: str):
+    """
+    Atomically takes the oldest runnable job.
+    SKIP LOCKED lets any number of workers poll the table without blocking each other.
+    """
+    job = db.execute(
+        select(Job)
+        .where(Job.status == JobStatus.QUEUED.value, Job.run_after <= _now())
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.RUNNING.value
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = _now()
+    db.commit()
+
+    return _snapshot(job)
+
+
+def load_job_files(db: Session, job_id: int) -> list:
+    files = db.query(JobFile).filter(JobFile.job_id == job_id).order_by(JobFile.position).all()
+    return [(file.filename, file.content) for file in files]
+
+
+def heartbeat_job(db: Session, job_id: int, worker_id: str):
+    """Extends the lease so a long running job is not mistaken for a crashed one."""
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING.value)
+        .values(locked_at=_now())
+    )
+    db.commit()
+
+
+def complete_job(db: Session, job_id: int, worker_id: str, result: dict):
+    updated = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id)
+        .values(status=JobStatus.SUCCEEDED.value, result=result, error=None, locked_by=None, locked_at=None)
+    ).rowcount
+    if updated:
+        # Uploaded pages are only needed while the job can still run
+        db.execute(delete(JobFile).where(JobFile.job_id == job_id))
+    db.commit()
+
+
+def release_job(db: Session, job_id: int, worker_id: str):
+    """
+    Gives a job back to the queue without consuming an attempt, used on graceful shutdown.
+    """
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING.value)
+        .values(status=JobStatus.QUEUED.value, attempts=Job.attempts - 1, locked_by=None, locked_at=None)
+    )
+    db.commit()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff, jittered between 50% and 100% of the step."""
+    ceiling = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str, retry: bool = True):
+    """
+    Schedules a retry with backoff, or marks the job failed once max_attempts is reached.
+    With retry=False (the failure would happen again on every attempt) it is marked failed straight away.
+    """
+    job = db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id).with_for_update().first()
+    if job is None:
+        # Lease was lost (recovered by another worker), nothing to do
+        db.rollback()
+        return
+
+    job.error = error
+    job.locked_by = None
+    job.locked_at = None
+
+    if retry and job.attempts < job.max_attempts:
+        job.status = JobStatus.QUEUED.value
+        job.run_after = _now() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = JobStatus.FAILED.value
+        db.execute(delete(JobFile).where(JobFile.job_id == job_id))
+
+    db.commit()
+
+
+def recover_stale_jobs(db: Session) -> int:
+    """
+    Requeues jobs whose worker stopped heartbeating (crashed or was killed).
+    Jobs that already used all their attempts are marked failed.
+    """
+    stale_jobs = db.execute(
+        select(Job)
+        .where(Job.status == JobStatus.RUNNING.value, Job.locked_at < _now() - timedelta(seconds=JOB_LEASE_SECONDS))
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    for job in stale_jobs:
+        job.locked_by = None
+        job.locked_at = None
+        job.error = "Worker lease expired."
+
+        if retry and job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED.value
+            job.run_after = _now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = JobStatus.FAILED.value
+            db.execute(delete(JobFile).where(JobFile.job_id == job.id))
+
+    db.commit()
+    return len(stale_jobs)
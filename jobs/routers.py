@@ -0,0 +1,108 @@
+import asyncio
+import os
+from typing import List
+
+from dotenv import load_dotenv
+from fastapi import UploadFile, File, APIRouter, status, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from auth.auth_util import require_role
+from auth.principal_cache import Principal
+from core.global_constants import ErrorKeys, ErrorMessage, SuccessMessage, GlobalConstants, JobKind
+from core.uploads import spool_uploads, close_uploads
+from core.utils import response_schema
+from database.session import SessionLocal, get_db
+from evaluation.routers import validate_question_answer
+from evaluation.schema import EvaluateQuestionAnswer
+from jobs.queue import enqueue_job, get_job
+from jobs.schema import JobResponse
+
+load_dotenv()
+router = APIRouter()
+
+
+def _enqueue(user_id: int, kind: str, payload: dict, files: list = None) -> dict:
+    with SessionLocal() as db:
+        return enqueue_job(db, user_id, kind, payload, files)
+
+
+async def _submit_ocr_job(files: List[UploadFile], kind: str, user_id: int) -> dict:
+    uploads = await spool_uploads(files)
+    try:
+        # Job files are persisted with the job, read out of the spool one at a time as they are written
+        job = await asyncio.to_thread(
+            _enqueue, user_id, kind, {}, ((upload.filename, upload.read()) for upload in uploads)
+        )
+    finally:
+        await asyncio.to_thread(close_uploads, uploads)
+
+    return response_schema(
+        SuccessMessage.JOB_SUBMITTED.value,
+        {"job_id": job["id"], "status": job["status"]},
+        status.HTTP_202_ACCEPTED
+    )
+
+
+@router.post("/ocr-question", status_code=status.HTTP_202_ACCEPTED)
+async def submit_ocr_question(files: List[UploadFile] = File(...), current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    if len(files) > int(os.getenv("MAXIMUM_QUESTION_FILES")):
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: ErrorMessage.MAXIMUM_QUESTION_FILES_ALLOWED.value
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    return await _submit_ocr_job(files, JobKind.OCR_QUESTION.value, current_user.id)
+
+
+@router.post("/ocr-answer", status_code=status.HTTP_202_ACCEPTED)
+async def submit_ocr_answer(files: List[UploadFile] = File(...), current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    if len(files) > int(os.getenv("MAXIMUM_ANSWER_FILES")):
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: ErrorMessage.MAXIMUM_ANSWER_FILES_ALLOWED.value
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    return await _submit_ocr_job(files, JobKind.OCR_ANSWER.value, current_user.id)
+
+
+@router.post("/evaluate", status_code=status.HTTP_202_ACCEPTED)
+async def submit_evaluation(payload: EvaluateQuestionAnswer, current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    question = payload.question.strip()
+    answer = payload.answer.strip()
+
+    error_response = validate_question_answer(question, answer)
+    if error_response:
+        return error_response
+
+    job = await asyncio.to_thread(
+        _enqueue, current_user.id, JobKind.EVALUATION.value, {"question": question, "answer": answer}
+    )
+
+    return response_schema(
+        SuccessMessage.JOB_SUBMITTED.value,
+        {"job_id": job["id"], "status": job["status"]},
+        status.HTTP_202_ACCEPTED
+    )
+
+
+@router.get("/{job_id}")
+def job_status(job_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+    job = get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ErrorMessage.NOT_FOUND.value)
+
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        JobResponse.model_validate(job).model_dump(mode="json"),
+        status.HTTP_200_OK
+    )
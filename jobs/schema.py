@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    created: Optional[datetime] = None
+    updated: Optional[datetime] = None
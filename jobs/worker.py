@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from core.global_constants import JobKind
+from database.session import SessionLocal
+from jobs.queue import claim_job, complete_job, fail_job, heartbeat_job, load_job_files, recover_stale_jobs, \
+    release_job, JOB_LEASE_SECONDS
+from ocr.ocr_engine import start_ocr_executor, shutdown_ocr_executor, ImageRejected
+from core.uploads import SpooledUpload
+from ocr.ocr_utils import extract_text_from_documents, build_ocr_result
+from services.evaluate import generate_ca_icmai_evaluation_prompt_async
+from services.groq_client import start_groq_client, close_groq_client
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "true").lower() == "true"
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 2))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))
+JOB_RECOVERY_INTERVAL_SECONDS = float(os.getenv("JOB_RECOVERY_INTERVAL_SECONDS", 60))
+
+
+def _in_session(fn, *args):
+    with SessionLocal() as db:
+        return fn(db, *args)
+
+
+async def _call(fn, *args):
+    # Queue operations are blocking SQLAlchemy calls
+    return await asyncio.to_thread(_in_session, fn, *args)
+
+
+async def _run_ocr_job(job: dict) -> dict:
+    files = await _call(load_job_files, job["id"])
+
+    uploads = [SpooledUpload.from_bytes(filename, content) for filename, content in files]
+    filenames, extracted_texts = await extract_text_from_documents(uploads)
+
+    return build_ocr_result(filenames, extracted_texts, len(files))
+
+
+async def _run_evaluation_job(job: dict) -> dict:
+    payload = job["payload"]
+
+    return await generate_ca_icmai_evaluation_prompt_async(payload["question"], payload["answer"])
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """
+    Failures caused by the job itself (an unreadable upload, an invalid payload):
+    retrying would only re-run the OCR and re-bill the LLM to fail the same way.
+    """
+    if isinstance(error, HTTPException):
+        return error.status_code < 500
+    return isinstance(error, (ValidationError, RequestValidationError, ImageRejected))
+
+
+JOB_HANDLERS = {
+    JobKind.OCR_QUESTION.value: _run_ocr_job,
+    JobKind.OCR_ANSWER.value: _run_ocr_job,
+    JobKind.EVALUATION.value: _run_evaluation_job,
+}
+
+
+class JobWorker:
+    """
+    Polls the jobs table and runs up to `concurrency` jobs at a time.
+    Can run inside the API process (see main.py) or standalone via `python -m jobs.worker`.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency
+        self._task = None
+        self._running = set()
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running, return_exceptions=True)
+        self._task = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        last_recovery = None
+
+        while True:
+            if last_recovery is None or loop.time() - last_recovery >= JOB_RECOVERY_INTERVAL_SECONDS:
+                last_recovery = loop.time()
+                try:
+                    recovered = await _call(recover_stale_jobs)
+                    if recovered:
+                        logger.warning(f"Recovered {recovered} stale job(s)")
+                except Exception:
+                    logger.exception("Stale job recovery failed")
+
+            await slots.acquire()
+
+            try:
+                job = await _call(claim_job, self.worker_id)
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+
+            if job is None:
+                slots.release()
+                await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await _call(heartbeat_job, job_id, self.worker_id)
+            except Exception:
+                logger.exception(f"Heartbeat failed for job {job_id}")
+
+    async def _execute(self, job: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+
+        try:
+            handler = JOB_HANDLERS[job["kind"]]
+            result = await handler(job)
+        except asyncio.CancelledError:
+            await _call(release_job, job["id"], self.worker_id)
+            raise
+        except Exception as e:
+            permanent = is_permanent_failure(e)
+            logger.exception(f"Job {job['id']} failed (attempt {job['attempts']}{', not retried' if permanent else ''})")
+            await _call(fail_job, job["id"], self.worker_id, str(e) or e.__class__.__name__, not permanent)
+        else:
+            await _call(complete_job, job["id"], self.worker_id, result)
+        finally:
+            heartbeat.cancel()
+
+
+async def main():
+    start_ocr_executor()
+    start_groq_client()
+
+    worker = JobWorker()
+    logger.info(f"Job worker {worker.worker_id} started")
+
+    try:
+        await worker.run()
+    finally:
+        await close_groq_client()
+        shutdown_ocr_executor()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,25 +1,63 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from auth import model as auth_models
 from auth import routers as auth_routes
+from core.admission import AdmissionMiddleware
 from core.exceptions import register_exception_handlers
-from database.session import engine
+from core.metrics import MetricsMiddleware, register_pool_metrics, render_metrics, start_default_executor
+from core.security import start_hashing_executor, shutdown_hashing_executor
+from core.startup import readiness, start_startup_tasks, stop_startup_tasks
+from core.token_revocation import start_revocation_sync, stop_revocation_sync
+from core.uploads import RequestSizeLimitMiddleware
+from database import routers as database_routes
+from database.session import async_engine, pool_metrics, async_pool_metrics
+from evaluation import model as evaluation_models
 from evaluation import routers as evaluation_routes
+from jobs import routers as job_routes
+from jobs.worker import JobWorker, JOB_WORKER_IN_PROCESS
 from ocr import routers as ocr_routes
+from pipeline import routers as pipeline_routes
+from profiling import routers as profiling_routes
+from profiling.middleware import ProfilingMiddleware
+from ocr.ocr_engine import start_ocr_executor, shutdown_ocr_executor
+from services.evaluation_history import start_evaluation_history, stop_evaluation_history
+from services.groq_client import start_groq_client, close_groq_client
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Counts its own work for the asyncio thread pool gauges
+    start_default_executor()
+    start_ocr_executor()
+    start_hashing_executor()
+    start_groq_client()
+    # Schema creation and OCR warmup run in the background, see /ready
+    start_startup_tasks()
+    await start_revocation_sync()
+    # Evaluation history is written in batches off the request path
+    start_evaluation_history()
 
-try:
-    auth_models.Base.metadata.create_all(bind=engine)
-except Exception as e:
-    import traceback
+    job_worker = JobWorker() if JOB_WORKER_IN_PROCESS else None
+    if job_worker:
+        job_worker.start()
 
-    print("Error during table creation:")
-    traceback.print_exc()
+    yield
 
-    print("Error during table creation:")
-    traceback.print_exc()
+    if job_worker:
+        await job_worker.stop()
+    await stop_evaluation_history()
+    await stop_revocation_sync()
+    await stop_startup_tasks()
+    await close_groq_client()
+    shutdown_hashing_executor()
+    shutdown_ocr_executor()
+    await async_engine.dispose()
 
-app = FastAPI(title="Eval CA Service", version="0.1.0", debug=True)
+
+app = FastAPI(title="Eval CA Service", version="0.1.0", debug=True, lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -28,20 +66,45 @@ origins = [
     "http://127.0.0.1:3000",
 ]
 
+# Added before CORS so CORS still decorates their 413 / 429 / 503 / profiler responses
+app.add_middleware(RequestSizeLimitMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id", "Server-Timing"],
 )
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 register_exception_handlers(app)
+register_pool_metrics({"sync": pool_metrics, "async": async_pool_metrics})
 
 app.include_router(auth_routes.router, prefix="/auth", tags=["Auth"])
 app.include_router(ocr_routes.router, prefix="/ocr", tags=["OCR"])
 app.include_router(evaluation_routes.router, prefix="/evaluate", tags=["Evaluation"])
+app.include_router(job_routes.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(pipeline_routes.router, prefix="/pipeline", tags=["Pipeline"])
+app.include_router(database_routes.router, prefix="/database", tags=["Database"])
+app.include_router(profiling_routes.router, prefix="/profiles", tags=["Profiling"])
 
 
 @app.get("/")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # async: the thread pool gauges are read from the running event loop
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+from dotenv import load_dotenv
+
+from ocr.ocr_engine import OCR_LANG, OCR_USE_ANGLE_CLS, OCR_PDF_DPI
+from ocr.preprocess import OCR_DESKEW, OCR_DESKEW_MAX_ANGLE, OCR_GRAYSCALE, OCR_MAX_PIXELS, OCR_MAX_SIDE
+
+load_dotenv()
+
+OCR_CACHE_MEMORY_ENTRIES = int(os.getenv("OCR_CACHE_MEMORY_ENTRIES", 512))
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", ".cache/ocr")
+OCR_CACHE_MAX_DISK_BYTES = int(os.getenv("OCR_CACHE_MAX_DISK_BYTES", 256 * 1024 * 1024))
+
+
+def _model_version() -> str:
+    try:
+        return metadata.version("paddleocr")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class OcrResultCache:
+    """
+    Two tier cache of OCR results keyed by image content and OCR configuration:
+    - a bounded in-memory LRU
+    - a size capped on-disk store (one JSON file per entry) that survives restarts
+
+    All methods are blocking and thread-safe; call them through asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, memory_entries: int, max_disk_bytes: int):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        # Every setting that changes the OCR text is in here: any change changes every key,
+        # so results produced under other settings are never served
+        self.config_fingerprint = "|".join(str(setting) for setting in (
+            OCR_LANG,
+            OCR_USE_ANGLE_CLS,
+            _model_version(),
+            OCR_PDF_DPI,
+            OCR_MAX_SIDE,
+            OCR_MAX_PIXELS,
+            OCR_GRAYSCALE,
+            OCR_DESKEW,
+            OCR_DESKEW_MAX_ANGLE
+        ))
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def make_key(self, content_sha256: str) -> str:
+        """Keys are derived from the upload digest computed while it was streamed in."""
+        return hashlib.sha256(f"{self.config_fingerprint}|{content_sha256}".encode()).hexdigest()
+
+    def make_keys(self, digests: list) -> list:
+        return [self.make_key(content_sha256) for content_sha256 in digests]
+
+    def make_pdf_page_keys(self, pdf_sha256: str, page_count: int) -> list:
+        """One key per page of a PDF."""
+        prefix = f"{self.config_fingerprint}|pdf|{pdf_sha256}"
+
+        keys = []
+        for page_index in range(page_count):
+            keys.append(hashlib.sha256(f"{prefix}|page={page_index}".encode()).hexdigest())
+        return keys
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: dict):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # Bump mtime so disk eviction is least-recently-used
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def get_many(self, keys: list) -> list:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+            written = os.path.getsize(path)
+        except OSError:
+            # The disk tier is best effort, the memory tier still has the entry
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += written
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def set_many(self, entries: dict):
+        for key, value in entries.items():
+            self.set(key, value)
+
+    def _disk_entries(self) -> list:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, size, _ in self._disk_entries())
+
+    def _evict_disk(self):
+        """Drops the least recently used files until the store is at 90% of its cap."""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_disk_bytes * 0.9)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        self._disk_bytes = total
+
+    def purge(self) -> int:
+        with self._lock:
+            self._memory.clear()
+            removed = 0
+            for _, _, path in self._disk_entries():
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            self._disk_bytes = 0
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            return {
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.memory_entries,
+                "disk_bytes": self._disk_bytes,
+                "disk_capacity_bytes": self.max_disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "config_fingerprint": self.config_fingerprint
+            }
+
+
+ocr_cache = OcrResultCache(OCR_CACHE_DIR, OCR_CACHE_MEMORY_ENTRIES, OCR_CACHE_MAX_DISK_BYTES)
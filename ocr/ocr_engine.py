@@ -0,0 +1,304 @@
+import asyncio
+import math
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", 2))
+OCR_THREADS_PER_WORKER = int(os.getenv("OCR_THREADS_PER_WORKER", 2))
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", 4))
+OCR_LANG = os.getenv("OCR_LANG", "en")
+OCR_USE_ANGLE_CLS = os.getenv("OCR_USE_ANGLE_CLS", "true").lower() == "true"
+OCR_PDF_DPI = int(os.getenv("OCR_PDF_DPI", 200))
+DISABLE_MODEL_SOURCE_CHECK = os.getenv("DISABLE_MODEL_SOURCE_CHECK")
+
+
+class ImageRejected(ValueError):
+    """Raised by the workers for uploads that cannot or must not be decoded."""
+
+
+# PaddleOCR instance owned by the current worker process
+_worker_ocr = None
+# (pid, inference ms) of the warm-up run by the current worker process, None until one succeeded
+_worker_warmup = None
+
+# Process pool owned by the API process
+_executor = None
+# Tasks submitted to the pool and not finished yet; done callbacks run on the pool's manager thread
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _init_worker(threads: int, disable_model_source_check: str = None):
+    """
+    Runs once in every OCR worker process.
+    Thread counts and the model source check must be set before paddle is imported,
+    otherwise every worker grabs all cores and they fight each other.
+    The worker warms up here, so it never takes a task cold; a failed warm-up is
+    retried by _report_warm_up.
+    """
+    global _worker_ocr, _worker_warmup
+
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    if disable_model_source_check:
+        # PaddleX reads the setting under its own prefixed name
+        os.environ["DISABLE_MODEL_SOURCE_CHECK"] = disable_model_source_check
+        os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = disable_model_source_check
+
+    from paddleocr import PaddleOCR
+
+    _worker_ocr = PaddleOCR(
+        use_angle_cls=OCR_USE_ANGLE_CLS,
+        lang=OCR_LANG,
+        cpu_threads=threads
+    )
+    try:
+        _worker_warmup = _warm_up()
+    except Exception:
+        # Raising here would break the whole pool and fail every OCR task
+        traceback.print_exc()
+
+
+def _parse_result(page) -> dict:
+    extracted_lines = []
+    confidences = []
+
+    texts = page.get("rec_texts", [])
+    scores = page.get("rec_scores", [])
+
+    for text, score in zip(texts, scores):
+        if text.strip():
+            extracted_lines.append(text)
+            confidences.append(float(score))
+
+    full_text = "\n".join(extracted_lines)
+
+    avg_confidence = (
+        round(sum(confidences) / len(confidences), 2)
+        if confidences else 0.0
+    )
+
+    return {
+        "text": full_text.strip(),
+        "confidence": avg_confidence
+    }
+
+
+@contextmanager
+def _open_source(source):
+    """
+    Bytes are used as they are; a str is the path of an upload spooled to disk,
+    which is memory-mapped so the decoder reads it without a copy.
+    """
+    if not isinstance(source, str):
+        yield source
+        return
+
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+
+def _preprocess_source(source, timings: dict):
+    from ocr.preprocess import preprocess_image
+
+    with _open_source(source) as buffer:
+        try:
+            return preprocess_image(buffer, timings)
+        except Exception as e:
+            # Frames in the traceback still hold numpy views of the mmap, which then
+            # cannot be closed (BufferError) and the real error would be lost
+            traceback.clear_frames(e.__traceback__)
+            raise
+
+
+def _run_ocr_batch(images: list) -> list:
+    """
+    Executed inside a worker process: preprocess every image of the batch and
+    send them through detection and recognition in a single PaddleOCR call.
+    Images are bytes or spooled file paths. Results are returned in input order,
+    each with its per-stage timings.
+    """
+    timings = [{} for _ in images]
+    image_arrays = [_preprocess_source(image, image_timings) for image, image_timings in zip(images, timings)]
+
+    started = time.perf_counter()
+    ocr_result = _worker_ocr.ocr(image_arrays)
+    ocr_ms = round((time.perf_counter() - started) * 1000 / len(images), 2)
+
+    results = []
+    for page, image_timings in zip(ocr_result, timings):
+        image_timings["ocr_ms"] = ocr_ms
+        results.append({**_parse_result(page), "timings": image_timings})
+    return results
+
+
+def _count_pdf_pages(path: str) -> int:
+    from ocr.preprocess import count_pdf_pages
+
+    return count_pdf_pages(path)
+
+
+def _run_ocr_pdf_page(path: str, page_index: int) -> dict:
+    """
+    Executed inside a worker process: render one PDF page and OCR it straight away,
+    so a worker never holds more than a single page bitmap.
+    """
+    from ocr.preprocess import render_pdf_page, normalize_image
+
+    timings = {}
+    image = normalize_image(render_pdf_page(path, page_index, timings), timings)
+
+    started = time.perf_counter()
+    ocr_result = _worker_ocr.ocr(image)
+    timings["ocr_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    return {**_parse_result(ocr_result[0]), "timings": timings}
+
+
+def _warm_up() -> tuple:
+    """
+    One inference on a small synthetic line of text,
+    so detection and recognition are both initialised before real traffic.
+    """
+    import cv2
+    import numpy as np
+
+    image = np.full((96, 480, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "Warmup 0123", (12, 64), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+
+    started = time.perf_counter()
+    _worker_ocr.ocr(image)
+    return os.getpid(), round((time.perf_counter() - started) * 1000, 2)
+
+
+def _report_warm_up() -> tuple:
+    """
+    Executed inside a worker process: the (pid, inference ms) of its warm-up.
+    A warm-up that failed is run again here, and raises if it fails again.
+    """
+    global _worker_warmup
+
+    if _worker_warmup is None:
+        _worker_warmup = _warm_up()
+    return _worker_warmup
+
+
+def start_ocr_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        # spawn: paddle is not fork-safe once it has been initialised
+        _executor = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(OCR_THREADS_PER_WORKER, DISABLE_MODEL_SOURCE_CHECK)
+        )
+    return _executor
+
+
+def pending_ocr_tasks() -> int:
+    """Submitted OCR tasks that have not finished yet, running or queued."""
+    return _pending
+
+
+def _task_finished(_):
+    global _pending
+
+    with _pending_lock:
+        _pending -= 1
+
+
+def _submit(fn, *args) -> asyncio.Future:
+    """Submits a task to the worker pool, counting it as pending until it has finished."""
+    global _pending
+
+    with _pending_lock:
+        _pending += 1
+    try:
+        future = start_ocr_executor().submit(fn, *args)
+    except BaseException:
+        _task_finished(None)
+        raise
+    future.add_done_callback(_task_finished)
+    return asyncio.wrap_future(future)
+
+
+def shutdown_ocr_executor():
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_ocr(image) -> dict:
+    """
+    Submits an image (bytes or a spooled file path) to the OCR worker pool
+    and awaits the result without blocking the event loop.
+    """
+    results = await run_ocr_batch([image])
+    return results[0]
+
+
+async def run_ocr_batch(images: list) -> list:
+    """
+    Spreads the pages of one request over the worker pool.
+    Pages are split into contiguous batches (at most OCR_BATCH_SIZE pages each)
+    so every worker gets a share, and results come back in upload order.
+    """
+    if not images:
+        return []
+
+    batch_size = min(OCR_BATCH_SIZE, math.ceil(len(images) / OCR_WORKERS))
+    batches = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+
+    batch_results = await asyncio.gather(*(
+        _submit(_run_ocr_batch, batch)
+        for batch in batches
+    ))
+
+    return [result for batch in batch_results for result in batch]
+
+
+async def get_pdf_page_count(path: str) -> int:
+    """Opens the PDF in a worker (pdfium parsing is CPU bound) and returns its page count."""
+    return await _submit(_count_pdf_pages, path)
+
+
+async def run_ocr_pdf_page(path: str, page_index: int) -> dict:
+    """Renders and OCRs a single page of the PDF at `path` in the worker pool."""
+    return await _submit(_run_ocr_pdf_page, path, page_index)
+
+
+async def warm_up_ocr_workers() -> list:
+    """
+    Waits until every worker is warm; starting the pool spawns the workers, each building
+    its PaddleOCR instance and warming up in the initializer. A worker that is already warm
+    may take several of the tasks, so they are sent until every worker has reported its pid.
+    Returns (pid, inference ms) per worker; raises the error of a worker whose warm-up failed.
+    """
+    warmups = {}
+
+    while len(warmups) < OCR_WORKERS:
+        reports = await asyncio.gather(*(
+            _submit(_report_warm_up)
+            for _ in range(OCR_WORKERS - len(warmups))
+        ))
+        if all(pid in warmups for pid, _ in reports):
+            # Only warm workers answered, give the others time to finish initialising
+            await asyncio.sleep(0.1)
+        warmups.update(reports)
+
+    return list(warmups.items())
@@ -1,52 +1,236 @@
+import asyncio
+import hashlib
+import logging
 import os
+import tempfile
 
 from dotenv import load_dotenv
-from paddleocr import PaddleOCR
-from PIL import Image
-import numpy as np
-import io
-import cv2
+from fastapi import HTTPException, status
+
+from core.global_constants import ErrorMessage
+from core.metrics import observe_stage_timings
+from core.singleflight import SingleFlight
+from core.uploads import close_uploads
+from ocr.ocr_cache import ocr_cache
+from ocr.ocr_engine import OCR_WORKERS, run_ocr_batch, get_pdf_page_count, run_ocr_pdf_page, ImageRejected
 
 load_dotenv()
-# Initialize PaddleOCR ONCE (important)
-ocr = PaddleOCR(
-    use_angle_cls=True,
-    lang="en"
-)
 
-os.environ["DISABLE_MODEL_SOURCE_CHECK"] = os.getenv("DISABLE_MODEL_SOURCE_CHECK")
+logger = logging.getLogger(__name__)
+
+MAXIMUM_PDF_PAGES = int(os.getenv("MAXIMUM_PDF_PAGES", 60))
+
+# The header may be preceded by junk, readers accept it anywhere in the first 1024 bytes
+_PDF_MAGIC = b"%PDF-"
+_PDF_HEADER_WINDOW = 1024
+
+# The same pages submitted twice at once (double click, client retry) are OCRed once
+ocr_flights = SingleFlight("ocr")
+
+
+def _start_flight(uploads: list, work) -> asyncio.Task:
+    """
+    Starts an OCR flight that reads `uploads`. It holds its own reference on them,
+    so the request that started it may go away while other requests still wait.
+    The references are released from a done callback, which also runs when the
+    flight is cancelled before it got to run.
+    """
+    for upload in uploads:
+        upload.retain()
+
+    task = asyncio.create_task(work)
+    task.add_done_callback(lambda _: asyncio.get_running_loop().run_in_executor(None, close_uploads, uploads))
+    return task
+
+
+async def _ocr_images(uploads: list, keys: list) -> list:
+    # PaddleOCR runs in the worker pool, see ocr/ocr_engine.py
+    try:
+        results = await run_ocr_batch([upload.source for upload in uploads])
+    except ImageRejected as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    for result in results:
+        # Timings describe this run only, they are not cached
+        timings = result.pop("timings", {})
+        observe_stage_timings(timings)
+        logger.debug(f"OCR stage timings: {timings}")
+
+    await asyncio.to_thread(ocr_cache.set_many, dict(zip(keys, results)))
+    return results
+
+
+async def extract_text_from_images(uploads: list) -> list:
+    """
+    OCRs image uploads (SpooledUpload) together.
+    Pages already seen (same content, same OCR configuration) are served from the cache,
+    only the rest goes to the worker pool. Results are in the same order as `uploads`.
+    """
+    keys = ocr_cache.make_keys([upload.sha256 for upload in uploads])
+    results = await asyncio.to_thread(ocr_cache.get_many, keys)
+
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        missing_uploads = [uploads[index] for index in missing]
+        missing_keys = [keys[index] for index in missing]
+        # A retried or double-submitted request sends the same batch
+        flight_key = hashlib.sha256("|".join(missing_keys).encode()).hexdigest()
+        fresh_results = await ocr_flights.do(
+            flight_key,
+            lambda: _start_flight(missing_uploads, _ocr_images(missing_uploads, missing_keys))
+        )
+
+        for index, result in zip(missing, fresh_results):
+            # Copies: the results of a shared flight go to every waiting request
+            results[index] = dict(result)
+
+    return results
+
+
+def is_pdf(upload) -> bool:
+    return _PDF_MAGIC in upload.head[:_PDF_HEADER_WINDOW]
+
+
+def _write_temp_file(content, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(content)
+        return f.name
+
+
+async def _ocr_pdf(upload) -> list:
+    # Large uploads are already spooled to disk, small ones need a file for pdfium
+    temporary_path = None
+    if upload.path is None:
+        temporary_path = await asyncio.to_thread(_write_temp_file, upload.content, ".pdf")
+    path = upload.path or temporary_path
+
+    try:
+        try:
+            page_count = await get_pdf_page_count(path)
+        except ImageRejected as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-async def extract_text_from_image(file) -> dict:
-    image_bytes = await file.read()
+        if page_count > MAXIMUM_PDF_PAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ErrorMessage.MAXIMUM_PDF_PAGES_ALLOWED.value
+            )
 
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    image_np = np.array(image)
-    image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        keys = ocr_cache.make_pdf_page_keys(upload.sha256, page_count)
+        results = await asyncio.to_thread(ocr_cache.get_many, keys)
 
-    ocr_result = ocr.ocr(image_np)
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            semaphore = asyncio.Semaphore(OCR_WORKERS)
 
-    extracted_lines = []
-    confidences = []
+            async def ocr_page(page_index: int):
+                async with semaphore:
+                    result = await run_ocr_pdf_page(path, page_index)
+                timings = result.pop("timings", {})
+                observe_stage_timings(timings)
+                logger.debug(f"OCR stage timings for page {page_index + 1}: {timings}")
+                results[page_index] = result
 
-    for page in ocr_result:
-        texts = page.get("rec_texts", [])
-        scores = page.get("rec_scores", [])
+            # A failing page cancels the remaining ones before the file is removed
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for page_index in missing:
+                        group.create_task(ocr_page(page_index))
+            except* ImageRejected as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e.exceptions[0]))
 
-        for text, score in zip(texts, scores):
-            if text.strip():
-                extracted_lines.append(text)
-                confidences.append(float(score))
+            await asyncio.to_thread(ocr_cache.set_many, {keys[index]: results[index] for index in missing})
+    finally:
+        if temporary_path is not None:
+            await asyncio.to_thread(os.remove, temporary_path)
 
-    full_text = "\n".join(extracted_lines)
+    return results
 
-    avg_confidence = (
-        round(sum(confidences) / len(confidences), 2)
-        if confidences else 0.0
+
+async def extract_text_from_pdf(upload) -> list:
+    """
+    OCRs every page of a PDF upload, one result per page (with its 1-based `page`), in page order.
+
+    Workers open the document from its file and render + OCR one page per task,
+    and at most OCR_WORKERS pages are in flight, so a long booklet is never
+    held in memory as a list of bitmaps. The same document submitted concurrently is OCRed once.
+    """
+    results = await ocr_flights.do(f"pdf|{upload.sha256}", lambda: _start_flight([upload], _ocr_pdf(upload)))
+    return [{**result, "page": page_index + 1} for page_index, result in enumerate(results)]
+
+
+async def extract_text_from_documents(uploads: list) -> tuple:
+    """
+    OCRs a mix of image and PDF uploads (SpooledUpload): images are batched through
+    the pool together, PDFs are expanded into one entry per page.
+    Returns (filenames, results) aligned entry by entry, in upload order.
+    """
+    pdf_indexes = [index for index, upload in enumerate(uploads) if is_pdf(upload)]
+    image_indexes = [index for index in range(len(uploads)) if index not in pdf_indexes]
+
+    image_results, pdf_results = await asyncio.gather(
+        extract_text_from_images([uploads[index] for index in image_indexes]),
+        asyncio.gather(*(extract_text_from_pdf(uploads[index]) for index in pdf_indexes))
+    )
+
+    results_by_index = dict(zip(image_indexes, ([result] for result in image_results)))
+    results_by_index.update(zip(pdf_indexes, pdf_results))
+
+    entry_filenames = []
+    entry_results = []
+    for index, upload in enumerate(uploads):
+        for result in results_by_index[index]:
+            entry_filenames.append(upload.filename)
+            entry_results.append(result)
+
+    return entry_filenames, entry_results
+
+
+def build_ocr_result(filenames: list, extracted_texts: list, total_files: int = None) -> dict:
+    """
+    Combines per-file OCR output into the response returned by the OCR endpoints.
+    PDF pages are individual entries carrying their `page` number;
+    `total_files` is the number of uploads when that differs from the number of entries.
+    """
+    individual_results = []
+    combined_text_parts = []
+    confidence_scores = []
+
+    for filename, extracted_text in zip(filenames, extracted_texts):
+
+        text = extracted_text.get("text", "")
+        confidence = extracted_text.get("confidence")
+
+        individual_result = {
+            "filename": filename,
+            "text": text,
+            "confidence": confidence
+        }
+        if "page" in extracted_text:
+            individual_result["page"] = extracted_text["page"]
+        individual_results.append(individual_result)
+
+        if text:
+            combined_text_parts.append(text)
+
+        if confidence is not None:
+            confidence_scores.append(float(confidence))
+
+    # Combine all text
+    combined_text = "\n\n".join(combined_text_parts)
+
+    # Compute average confidence
+    average_confidence = (
+        round(sum(confidence_scores) / len(confidence_scores), 2)
+        if confidence_scores
+        else 0.0
     )
 
     return {
-       "text": full_text.strip(),
-        "confidence": avg_confidence
+        "individual_results": individual_results,
+        "combined_text": combined_text,
+        "average_confidence": average_confidence,
+        "total_files": total_files if total_files is not None else len(filenames)
     }
 
 
@@ -56,9 +240,6 @@ def split_question_answer(text: str):
     - Question usually ends with '?' or 'Marks'
     - Everything after is treated as answer
     """
-
-    print(text)
-
     lines = text.split("\n")
 
     question_lines = []
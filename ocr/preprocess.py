@@ -0,0 +1,181 @@
+import io
+import os
+import time
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from PIL import Image, UnidentifiedImageError
+
+from core.global_constants import ErrorMessage
+from ocr.ocr_engine import OCR_PDF_DPI, ImageRejected
+
+load_dotenv()
+
+# Longest side sent to the detector; larger images only cost time and memory
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", 2048))
+# Decompression bomb guard, checked from the header before decoding
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", 60_000_000))
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "false").lower() == "true"
+OCR_DESKEW = os.getenv("OCR_DESKEW", "false").lower() == "true"
+OCR_DESKEW_MAX_ANGLE = float(os.getenv("OCR_DESKEW_MAX_ANGLE", 15))
+
+# Enough for the header of any common format, including large EXIF blocks
+_HEADER_BYTES = 512 * 1024
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def read_dimensions(buffer) -> tuple:
+    """Reads width and height from the image header without decoding pixels."""
+    try:
+        with Image.open(io.BytesIO(memoryview(buffer)[:_HEADER_BYTES])) as image:
+            return image.size
+    except Image.DecompressionBombError:
+        # PIL refuses to even open images above ~179M pixels
+        raise ImageRejected(ErrorMessage.IMAGE_TOO_LARGE.value)
+    except (UnidentifiedImageError, OSError):
+        raise ImageRejected(ErrorMessage.INVALID_IMAGE.value)
+
+
+def _reduced_decode_flag(longest_side: int) -> int:
+    """
+    Picks the largest power-of-two reduction that keeps the image at least OCR_MAX_SIDE.
+    JPEG decodes straight to the reduced size (DCT scaling) instead of full size then resize.
+    """
+    factor = longest_side / OCR_MAX_SIDE
+    if factor >= 8:
+        return cv2.IMREAD_REDUCED_COLOR_8
+    if factor >= 4:
+        return cv2.IMREAD_REDUCED_COLOR_4
+    if factor >= 2:
+        return cv2.IMREAD_REDUCED_COLOR_2
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(buffer, timings: dict) -> np.ndarray:
+    """
+    Decodes an encoded image straight into a BGR array, using a reduced decode
+    when the image is far above OCR_MAX_SIDE. `buffer` is any bytes-like object
+    (bytes, memoryview, mmap); it is wrapped, not copied.
+    """
+    started = time.perf_counter()
+
+    width, height = read_dimensions(buffer)
+    if width * height > OCR_MAX_PIXELS:
+        raise ImageRejected(ErrorMessage.IMAGE_TOO_LARGE.value)
+
+    encoded = np.frombuffer(buffer, dtype=np.uint8)
+    image = cv2.imdecode(encoded, _reduced_decode_flag(max(width, height)))
+    if image is None:
+        raise ImageRejected(ErrorMessage.INVALID_IMAGE.value)
+    timings["decode_ms"] = _elapsed_ms(started)
+
+    return image
+
+
+def render_pdf_page(path: str, page_index: int, timings: dict) -> np.ndarray:
+    """
+    Renders a single PDF page to a BGR array at OCR_PDF_DPI, lowered if needed
+    so the longest side stays within OCR_MAX_SIDE. Only this page is held in memory.
+    """
+    import pypdfium2 as pdfium
+
+    started = time.perf_counter()
+
+    try:
+        pdf = pdfium.PdfDocument(path)
+    except pdfium.PdfiumError:
+        raise ImageRejected(ErrorMessage.INVALID_PDF.value)
+
+    try:
+        page = pdf[page_index]
+        try:
+            width_pt, height_pt = page.get_size()
+            scale = min(OCR_PDF_DPI / 72, OCR_MAX_SIDE / max(width_pt, height_pt))
+            bitmap = page.render(scale=scale)
+            # Copy out of the pdfium buffer before the bitmap is released
+            image = bitmap.to_numpy().copy()
+            bitmap.close()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+    timings["render_ms"] = _elapsed_ms(started)
+    return image
+
+
+def count_pdf_pages(path: str) -> int:
+    import pypdfium2 as pdfium
+
+    try:
+        pdf = pdfium.PdfDocument(path)
+    except pdfium.PdfiumError:
+        raise ImageRejected(ErrorMessage.INVALID_PDF.value)
+
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def normalize_image(image: np.ndarray, timings: dict) -> np.ndarray:
+    """
+    Size-normalizing stage shared by uploaded images and rendered PDF pages:
+    downsample to OCR_MAX_SIDE, then optional grayscale and deskew.
+    """
+    started = time.perf_counter()
+    longest_side = max(image.shape[:2])
+    if longest_side > OCR_MAX_SIDE:
+        scale = OCR_MAX_SIDE / longest_side
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    timings["resize_ms"] = _elapsed_ms(started)
+
+    if OCR_GRAYSCALE:
+        started = time.perf_counter()
+        # PaddleOCR expects three channels
+        image = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+        timings["grayscale_ms"] = _elapsed_ms(started)
+
+    if OCR_DESKEW:
+        started = time.perf_counter()
+        image = deskew(image)
+        timings["deskew_ms"] = _elapsed_ms(started)
+
+    return image
+
+
+def deskew(image: np.ndarray) -> np.ndarray:
+    """Rotates the page so the dominant text direction is horizontal."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+    points = cv2.findNonZero(ink)
+    if points is None:
+        return image
+
+    (_, _), (rect_width, rect_height), angle = cv2.minAreaRect(points)
+    # Measure the angle of the long side (text runs along it), folded into (-45, 45]
+    if rect_width < rect_height:
+        angle += 90
+    while angle > 45:
+        angle -= 90
+    while angle <= -45:
+        angle += 90
+
+    if abs(angle) < 0.1 or abs(angle) > OCR_DESKEW_MAX_ANGLE:
+        return image
+
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def preprocess_image(buffer, timings: dict) -> np.ndarray:
+    """
+    Decode + normalize stage run before OCR. Stage durations are written to `timings`.
+    """
+    return normalize_image(decode_image(buffer, timings), timings)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List
 
@@ -5,16 +6,19 @@ from dotenv import load_dotenv
 from fastapi import UploadFile, File, APIRouter, status, Depends
 
 from auth.auth_util import require_role
-from auth.model import User
+from auth.principal_cache import Principal
+from core.admission import ocr_admission
 from core.global_constants import ErrorKeys, ErrorMessage, SuccessMessage, GlobalConstants
-from ocr.ocr_utils import extract_text_from_image
+from ocr.ocr_cache import ocr_cache
+from core.uploads import spool_uploads, close_uploads
+from ocr.ocr_utils import extract_text_from_documents, build_ocr_result
 from core.utils import response_schema
 
 load_dotenv()
 router = APIRouter()
 
 @router.post("/ocr-question")
-async def ocr_question(files: List[UploadFile] = File(...), current_user: User = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+async def ocr_question(files: List[UploadFile] = File(...), current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
     if len(files) > int(os.getenv("MAXIMUM_QUESTION_FILES")):
         return_data = {
             ErrorKeys.NON_FIELD_ERROR: ErrorMessage.MAXIMUM_QUESTION_FILES_ALLOWED.value
@@ -26,44 +30,15 @@ async def ocr_question(files: List[UploadFile] = File(...), current_user: User =
             status.HTTP_400_BAD_REQUEST
         )
 
-    individual_results = []
-    combined_text_parts = []
-    confidence_scores = []
+    ocr_admission.charge_items(current_user.id, len(files))
 
-    for file in files:
-        extracted_text = await extract_text_from_image(file)
+    uploads = await spool_uploads(files)
+    try:
+        filenames, extracted_texts = await extract_text_from_documents(uploads)
+    finally:
+        await asyncio.to_thread(close_uploads, uploads)
 
-        text = extracted_text.get("text", "")
-        confidence = extracted_text.get("confidence")
-
-        individual_results.append({
-            "filename": file.filename,
-            "text": text,
-            "confidence": confidence
-        })
-
-        if text:
-            combined_text_parts.append(text)
-
-        if confidence is not None:
-            confidence_scores.append(float(confidence))
-
-    # Combine all text
-    combined_text = "\n\n".join(combined_text_parts)
-
-    # Compute average confidence
-    average_confidence = (
-        round(sum(confidence_scores) / len(confidence_scores), 2)
-        if confidence_scores
-        else 0.0
-    )
-
-    final_result = {
-        "individual_results": individual_results,
-        "combined_text": combined_text,
-        "average_confidence": average_confidence,
-        "total_files": len(files)
-    }
+    final_result = build_ocr_result(filenames, extracted_texts, len(files))
 
     return response_schema(
         SuccessMessage.RECORD_RETRIEVED.value,
@@ -73,7 +48,7 @@ async def ocr_question(files: List[UploadFile] = File(...), current_user: User =
 
 
 @router.post("/ocr-answer")
-async def ocr_answer(files: List[UploadFile] = File(...), current_user: User = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
+async def ocr_answer(files: List[UploadFile] = File(...), current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))):
     if len(files) > int(os.getenv("MAXIMUM_ANSWER_FILES")):
         return_data = {
             ErrorKeys.NON_FIELD_ERROR: ErrorMessage.MAXIMUM_ANSWER_FILES_ALLOWED.value
@@ -85,47 +60,40 @@ async def ocr_answer(files: List[UploadFile] = File(...), current_user: User = D
             status.HTTP_400_BAD_REQUEST
         )
 
-    individual_results = []
-    combined_text_parts = []
-    confidence_scores = []
-
-    for file in files:
-        extracted_text = await extract_text_from_image(file)
+    ocr_admission.charge_items(current_user.id, len(files))
 
-        text = extracted_text.get("text", "")
-        confidence = extracted_text.get("confidence")
+    uploads = await spool_uploads(files)
+    try:
+        filenames, extracted_texts = await extract_text_from_documents(uploads)
+    finally:
+        await asyncio.to_thread(close_uploads, uploads)
 
-        individual_results.append({
-            "filename": file.filename,
-            "text": text,
-            "confidence": confidence
-        })
+    final_result = build_ocr_result(filenames, extracted_texts, len(files))
 
-        if text:
-            combined_text_parts.append(text)
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        final_result,
+        status.HTTP_200_OK
+    )
 
-        if confidence is not None:
-            confidence_scores.append(float(confidence))
 
-    # Combine all text
-    combined_text = "\n\n".join(combined_text_parts)
+@router.get("/cache")
+async def ocr_cache_stats(current_user: Principal = Depends(require_role(GlobalConstants.SUPERADMIN_ROLE_ID))):
+    stats = await asyncio.to_thread(ocr_cache.stats)
 
-    # Compute average confidence
-    average_confidence = (
-        round(sum(confidence_scores) / len(confidence_scores), 2)
-        if confidence_scores
-        else 0.0
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        stats,
+        status.HTTP_200_OK
     )
 
-    final_result = {
-        "individual_results": individual_results,
-        "combined_text": combined_text,
-        "average_confidence": average_confidence,
-        "total_files": len(files)
-    }
+
+@router.delete("/cache")
+async def purge_ocr_cache(current_user: Principal = Depends(require_role(GlobalConstants.SUPERADMIN_ROLE_ID))):
+    removed = await asyncio.to_thread(ocr_cache.purge)
 
     return response_schema(
-        SuccessMessage.RECORD_RETRIEVED.value,
-        final_result,
+        SuccessMessage.RECORD_DELETED.value,
+        {"removed_disk_entries": removed},
         status.HTTP_200_OK
-    )
\ No newline at end of file
+    )
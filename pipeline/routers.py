@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import UploadFile, File, Form, APIRouter, status, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from auth.auth_util import require_role
+from auth.principal_cache import Principal
+from core.admission import ocr_admission
+from core.global_constants import ErrorKeys, ErrorMessage, GlobalConstants, SegmentationMode
+from core.uploads import spool_uploads, close_uploads
+from core.utils import response_schema, format_sse, SSE_HEADERS
+from evaluation.routers import validate_question_answer
+from ocr.ocr_utils import extract_text_from_documents, build_ocr_result, split_question_answer
+from services.evaluate import generate_ca_icmai_evaluation_prompt_async
+from services.evaluation_history import record_evaluation, track_llm_usage
+from services.llm import detect_question_answer_async
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _ocr_stage(stage: str, uploads: list):
+    entry_filenames, extracted_texts = await extract_text_from_documents(uploads)
+    return stage, build_ocr_result(entry_filenames, extracted_texts, len(uploads))
+
+
+@router.post("/scan-to-grade")
+async def scan_to_grade(
+        answer_files: List[UploadFile] = File(...),
+        question_files: Optional[List[UploadFile]] = File(None),
+        segmentation: SegmentationMode = Form(SegmentationMode.NONE),
+        current_user: Principal = Depends(require_role(GlobalConstants.TEACHER_ROLE_ID))
+):
+    """
+    OCR question and answer images, optionally segment the text, and evaluate it in one call.
+    Progress is streamed as Server-Sent Events, one event per finished stage:
+    ocr_question, ocr_answer, segmentation, evaluation, then result.
+    """
+    question_files = question_files or []
+
+    if len(question_files) > int(os.getenv("MAXIMUM_QUESTION_FILES")):
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: ErrorMessage.MAXIMUM_QUESTION_FILES_ALLOWED.value
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(answer_files) > int(os.getenv("MAXIMUM_ANSWER_FILES")):
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: ErrorMessage.MAXIMUM_ANSWER_FILES_ALLOWED.value
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    if not question_files and segmentation == SegmentationMode.NONE:
+        return_data = {
+            ErrorKeys.NON_FIELD_ERROR: ErrorMessage.QUESTION_SOURCE_REQUIRED.value
+        }
+
+        return response_schema(
+            ErrorMessage.BAD_REQUEST.value,
+            return_data,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    ocr_admission.charge_items(current_user.id, len(question_files) + len(answer_files))
+
+    # Spool uploads before streaming starts, the form files are closed once the handler returns
+    question_uploads = await spool_uploads(question_files)
+    try:
+        answer_uploads = await spool_uploads(answer_files)
+    except BaseException:
+        await asyncio.to_thread(close_uploads, question_uploads)
+        raise
+    uploads = question_uploads + answer_uploads
+
+    async def event_stream():
+        # Question and answer OCR overlap, each stage is reported as soon as it finishes
+        ocr_tasks = [asyncio.create_task(_ocr_stage("ocr_answer", answer_uploads))]
+        if question_uploads:
+            ocr_tasks.append(asyncio.create_task(_ocr_stage("ocr_question", question_uploads)))
+
+        try:
+            ocr_results = {"ocr_question": None}
+            for next_stage in asyncio.as_completed(ocr_tasks):
+                stage, result = await next_stage
+                ocr_results[stage] = result
+                yield format_sse(stage, result)
+
+            question_text = ocr_results["ocr_question"]["combined_text"] if ocr_results["ocr_question"] else ""
+            answer_text = ocr_results["ocr_answer"]["combined_text"]
+
+            if segmentation == SegmentationMode.NONE:
+                question, answer = question_text, answer_text
+            else:
+                text = "\n\n".join(part for part in (question_text, answer_text) if part)
+
+                if segmentation == SegmentationMode.LLM:
+                    segmented = await detect_question_answer_async(text)
+                    question, answer = segmented["question"], segmented["answer"]
+                else:
+                    question, answer = split_question_answer(text)
+
+                yield format_sse("segmentation", {"question": question, "answer": answer})
+
+            question = question.strip()
+            answer = answer.strip()
+
+            error_response = validate_question_answer(question, answer)
+            if error_response:
+                yield format_sse("error", error_response["data"])
+                return
+
+            # Tracked from here, so the segmentation call's tokens are not counted
+            usage = track_llm_usage()
+            started = time.perf_counter()
+            evaluation = await generate_ca_icmai_evaluation_prompt_async(question, answer)
+            logger.info(f"LLM response: {evaluation}")
+            record_evaluation(current_user.id, question, answer, evaluation, time.perf_counter() - started, usage)
+            yield format_sse("evaluation", evaluation)
+
+            yield format_sse("result", {
+                "question_ocr": ocr_results["ocr_question"],
+                "answer_ocr": ocr_results["ocr_answer"],
+                "question": question,
+                "answer": answer,
+                "evaluation": evaluation
+            })
+        except HTTPException as e:
+            # Rejected uploads (unsupported type, too large, too many PDF pages) and LLM unavailability:
+            # the client gets the reason, not a generic generation failure
+            logger.warning(f"Scan-to-grade pipeline stopped: {e.status_code} {e.detail}")
+            yield format_sse("error", {ErrorKeys.NON_FIELD_ERROR.value: e.detail, "status_code": e.status_code})
+        except Exception:
+            logger.exception("Scan-to-grade pipeline failed")
+            yield format_sse("error", {ErrorKeys.NON_FIELD_ERROR.value: ErrorMessage.ANSWER_GENERATION_FAILED.value})
+        finally:
+            # Client went away or a stage failed: do not leave OCR work running
+            for task in ocr_tasks:
+                task.cancel()
+
+    # Spooled files are removed once the response is done, however it ended
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(close_uploads, uploads)
+    )
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+
+from auth.auth_util import get_current_user, require_role
+from core.global_constants import ErrorKeys, ErrorMessage, GlobalConstants
+from core.metrics import stage_breakdown
+from core.utils import response_schema
+from profiling.profile_store import new_profile_id, save_profile
+from profiling.sampler import SamplingProfiler
+
+load_dotenv()
+
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 120))
+
+logger = logging.getLogger(__name__)
+
+_FALSE_VALUES = {"", "0", "false", "no", "off"}
+
+# The sampler sees every thread of the process, so two overlapping profiles
+# would each contain the other; one profiled request at a time
+_profile_active = False
+
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.decode("latin-1").strip().lower() not in _FALSE_VALUES
+
+    query_string = scope["query_string"]
+    if b"profile" not in query_string:
+        return False
+    values = parse_qs(query_string.decode("latin-1")).get("profile")
+    return bool(values) and values[-1].strip().lower() not in _FALSE_VALUES
+
+
+async def _authorize(headers: dict):
+    """
+    Same check as Depends(require_role(SUPERADMIN_ROLE_ID)). Teacher endpoints do not accept
+    a super admin, so the super admin token can be sent in X-Profile-Authorization while
+    Authorization carries the token the endpoint itself expects.
+    """
+    authorization = headers.get(b"x-profile-authorization") or headers.get(b"authorization") or b""
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ErrorMessage.AUTHORIZATION_HEADER_MISSING_OR_INVALID.value
+        )
+
+    user = await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token.strip()))
+    return await require_role(GlobalConstants.SUPERADMIN_ROLE_ID)(user)
+
+
+async def _reject(scope, receive, send, status_code: int, message: str):
+    payload = response_schema(
+        ErrorMessage.BAD_REQUEST.value,
+        {ErrorKeys.NON_FIELD_ERROR.value: [message]},
+        status_code
+    )
+    await JSONResponse(status_code=status_code, content=payload)(scope, receive, send)
+
+
+def _stage_summary(breakdown: dict) -> dict:
+    return {
+        stage: {"count": count, "total_ms": round(seconds * 1000, 2)}
+        for stage, (count, seconds) in sorted(breakdown.items(), key=lambda item: -item[1][1])
+    }
+
+
+def _server_timing(breakdown: dict) -> str:
+    return ", ".join(
+        f'{stage};desc="x{count}";dur={seconds * 1000:.1f}'
+        for stage, (count, seconds) in breakdown.items()
+    )
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request when it carries `X-Profile: 1` or `?profile=1` and the caller
+    is a super admin. The response gets X-Profile-Id and a Server-Timing header with the
+    stage breakdown so far; the full profile is stored before the last body chunk is sent,
+    see GET /profiles/{profile_id}. Other requests only pay for the flag lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        global _profile_active
+
+        try:
+            user = await _authorize(dict(scope["headers"]))
+        except HTTPException as e:
+            await _reject(scope, receive, send, e.status_code, e.detail)
+            return
+
+        if _profile_active:
+            await _reject(scope, receive, send, status.HTTP_409_CONFLICT, ErrorMessage.PROFILER_BUSY.value)
+            return
+
+        _profile_active = True
+        profile_id = new_profile_id()
+        breakdown = {}
+        context_token = stage_breakdown.set(breakdown)
+        started_at = datetime.now(timezone.utc)
+        status_code = 500
+        finished = False
+
+        profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS / 1000, PROFILE_MAX_SECONDS)
+        profiler.start()
+
+        async def finish():
+            nonlocal finished
+            global _profile_active
+
+            if finished:
+                return
+            finished = True
+            profiler.stop()
+            # The sampler may be mid-interval, do not hold up the event loop waiting for it
+            await asyncio.to_thread(profiler.join)
+            _profile_active = False
+
+            route = getattr(scope.get("route"), "path_format", None)
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status_code": status_code,
+                "user_id": user.id,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(profiler.duration_seconds * 1000, 2),
+                "sample_interval_ms": PROFILE_SAMPLE_INTERVAL_MS,
+                "sample_count": profiler.sample_count,
+                # OCR stages are measured inside the worker processes, which the sampler does not see
+                "stages": _stage_summary(breakdown)
+            }
+            try:
+                await asyncio.to_thread(
+                    save_profile,
+                    profile_id,
+                    summary,
+                    profiler.to_speedscope(f"{scope['method']} {route or scope['path']}"),
+                    profiler.to_collapsed()
+                )
+            except OSError:
+                logger.exception("Could not store profile %s", profile_id)
+
+        async def profiled_send(message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Profile-Id", profile_id)
+                if breakdown:
+                    headers.append("Server-Timing", _server_timing(breakdown))
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Stored before the response completes, so the client can fetch it right away
+                await finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            stage_breakdown.reset(context_token)
+            await finish()
@@ -0,0 +1,79 @@
+import glob
+import json
+import os
+import re
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".cache/profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))
+
+# format -> file suffix; the summary holds the request details and the stage breakdown
+PROFILE_FORMATS = {
+    "summary": ".json",
+    "speedscope": ".speedscope.json",
+    "collapsed": ".collapsed.txt"
+}
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def new_profile_id() -> str:
+    return uuid.uuid4().hex
+
+
+def profile_path(profile_id: str, profile_format: str):
+    """Returns the file of a stored profile, or None if the id or format is unknown."""
+    if not _PROFILE_ID.match(profile_id) or profile_format not in PROFILE_FORMATS:
+        return None
+
+    path = os.path.join(PROFILE_DIR, profile_id + PROFILE_FORMATS[profile_format])
+    return path if os.path.exists(path) else None
+
+
+def _summary_paths() -> list:
+    paths = [
+        path for path in glob.glob(os.path.join(PROFILE_DIR, "*.json"))
+        if _PROFILE_ID.match(os.path.basename(path).removesuffix(".json"))
+    ]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def _prune():
+    # Only the newest PROFILE_MAX_FILES profiles are kept
+    for path in _summary_paths()[PROFILE_MAX_FILES:]:
+        profile_id = os.path.basename(path).removesuffix(".json")
+        for suffix in PROFILE_FORMATS.values():
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profile_id: str, summary: dict, speedscope: dict, collapsed: str):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    with open(os.path.join(PROFILE_DIR, profile_id + PROFILE_FORMATS["speedscope"]), "w", encoding="utf-8") as f:
+        json.dump(speedscope, f)
+    with open(os.path.join(PROFILE_DIR, profile_id + PROFILE_FORMATS["collapsed"]), "w", encoding="utf-8") as f:
+        f.write(collapsed)
+    # Written last: a profile is listed once its summary exists
+    with open(os.path.join(PROFILE_DIR, profile_id + PROFILE_FORMATS["summary"]), "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+
+    _prune()
+
+
+def list_profiles() -> list:
+    """Summaries of the stored profiles, newest first."""
+    summaries = []
+    for path in _summary_paths():
+        try:
+            with open(path, encoding="utf-8") as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return summaries
@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from auth.auth_util import require_role
+from auth.principal_cache import Principal
+from core.global_constants import ErrorMessage, SuccessMessage, GlobalConstants
+from core.utils import response_schema
+from profiling.profile_store import list_profiles, profile_path
+
+router = APIRouter()
+
+_MEDIA_TYPES = {
+    "summary": "application/json",
+    "speedscope": "application/json",
+    "collapsed": "text/plain"
+}
+
+
+@router.get("")
+async def get_profiles(current_user: Principal = Depends(require_role(GlobalConstants.SUPERADMIN_ROLE_ID))):
+    return_data = await asyncio.to_thread(list_profiles)
+
+    return response_schema(
+        SuccessMessage.RECORD_RETRIEVED.value,
+        return_data,
+        status.HTTP_200_OK
+    )
+
+
+@router.get("/{profile_id}")
+async def get_profile(
+        profile_id: str,
+        format: str = "speedscope",
+        current_user: Principal = Depends(require_role(GlobalConstants.SUPERADMIN_ROLE_ID))
+):
+    path = profile_path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ErrorMessage.NOT_FOUND.value)
+
+    return FileResponse(path, media_type=_MEDIA_TYPES[format], filename=os.path.basename(path))
@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Frames below these directories are shown relative to them, keeping profiles readable
+_PATH_ROOTS = sorted(
+    {os.path.abspath(path) for path in sys.path if path and os.path.isdir(path)} | {os.getcwd()},
+    key=len,
+    reverse=True
+)
+
+
+def _short_path(filename: str) -> str:
+    for root in _PATH_ROOTS:
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every thread in the process from a background thread
+    using sys._current_frames(). Nothing is installed in the profiled code, so requests
+    that are not profiled are unaffected, and a profiled one only pays for the sampler
+    thread holding the GIL while it walks the stacks.
+    """
+
+    def __init__(self, interval_seconds: float, max_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.max_seconds = max_seconds
+        # (thread name, (frame, ...) root first) -> [sample count, sampled seconds]
+        self.stacks = {}
+        self.frames = {}
+        self.sample_count = 0
+        self.started = None
+        self.duration_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signals the sampler thread to stop; call join() before reading the samples."""
+        self._stop.set()
+        self.duration_seconds = time.perf_counter() - self.started
+
+    def join(self):
+        """Blocks until the sampler thread is done, up to one sample interval; call through asyncio.to_thread."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = self.started + self.max_seconds
+        previous = time.perf_counter()
+
+        while not self._stop.wait(self.interval_seconds):
+            now = time.perf_counter()
+            if now > deadline:
+                break
+            # Weight each sample by the real elapsed time, the wait overshoots under load
+            self._sample(own_id, now - previous)
+            previous = now
+
+    def _frame_key(self, frame) -> tuple:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        if key not in self.frames:
+            self.frames[key] = len(self.frames)
+        return key
+
+    def _sample(self, own_id: int, weight_seconds: float):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_key(frame))
+                frame = frame.f_back
+            stack.reverse()
+
+            entry = self.stacks.setdefault((names.get(thread_id, str(thread_id)), tuple(stack)), [0, 0.0])
+            entry[0] += 1
+            entry[1] += weight_seconds
+
+        self.sample_count += 1
+
+    @staticmethod
+    def _frame_label(key: tuple) -> str:
+        name, filename, line = key
+        return f"{name} ({_short_path(filename)}:{line})"
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, one "thread;frame;...;frame count" line per stack."""
+        lines = Counter()
+        for (thread_name, stack), (count, _) in self.stacks.items():
+            labels = [thread_name] + [self._frame_label(key).replace(";", ":") for key in stack]
+            lines[";".join(labels)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(lines.items()))
+
+    def to_speedscope(self, name: str) -> dict:
+        """A speedscope (https://www.speedscope.app) document with one sampled profile per thread."""
+        frames = [None] * len(self.frames)
+        for (function_name, filename, line), index in self.frames.items():
+            frames[index] = {"name": function_name, "file": _short_path(filename), "line": line}
+
+        profiles = {}
+        for (thread_name, stack), (count, seconds) in self.stacks.items():
+            profile = profiles.setdefault(thread_name, {"samples": [], "weights": []})
+            profile["samples"].append([self.frames[key] for key in stack])
+            profile["weights"].append(round(seconds * 1000, 3))
+
+        duration_ms = round(self.duration_seconds * 1000, 3)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "evalca-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread_name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": duration_ms,
+                    "samples": profile["samples"],
+                    "weights": profile["weights"]
+                }
+                # uvicorn runs the event loop on the main thread, speedscope opens the first profile
+                for thread_name, profile in sorted(profiles.items(), key=lambda item: (item[0] != "MainThread", item[0]))
+            ]
+        }
@@ -1,18 +1,29 @@
+import asyncio
+import hashlib
 import json
-import os
+import logging
+import re
 
 from dotenv import load_dotenv
-from groq import Groq
+
+from core.metrics import LLM_PARSE_FAILURES, observe_token_usage
+from core.singleflight import SingleFlight
+from services.evaluation_cache import evaluation_cache_key, get_cached_evaluation, store_evaluation
+from services.groq_client import completion_deadline, create_chat_completion, read_stream
+from services.groq_rate_limits import groq_rate_limits
 
 load_dotenv()
-def generate_ca_icmai_evaluation_prompt(question: str, answer: str) -> str:
-    """
-    Generates a Groq prompt to evaluate CA answers
-    strictly as per ICMAI / ICAI evaluation guidelines.
-    """
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-    prompt = f"""
+logger = logging.getLogger(__name__)
+
+EVALUATION_MODEL = "openai/gpt-oss-20b"
+
+# Identical evaluations running at the same time share one Groq call, keyed like the cache
+evaluation_flights = SingleFlight("evaluation")
+
+# The prompt is assembled from parts shared with the packed (several answers
+# per completion) prompt in services/packed_evaluation.py
+EVALUATION_PREAMBLE = """
 You are a senior ICMAI-certified examiner evaluating a Chartered Accountancy answer.
 
 Evaluate the student's answer STRICTLY based on ICMAI/ICAI examination standards.
@@ -25,13 +36,9 @@ Evaluate the student's answer STRICTLY based on ICMAI/ICAI examination standards
 - Give partial marks where applicable
 - Penalize irrelevance and incorrect concepts
 - Professional presentation matters (clarity, structure)
+"""
 
-### Question
-{question}
-
-### Student Answer
-{answer}
-
+EVALUATION_CRITERIA = """
 ### Evaluation Criteria
 Assess the answer on:
 1. Conceptual Accuracy
@@ -39,10 +46,9 @@ Assess the answer on:
 3. Logical Structure & Presentation
 4. Relevance to the Question
 5. Professional Language (not grammar perfection)
+"""
 
-### Output Format (STRICT JSON ONLY)
-{{
-  "total_marks": 10,
+EVALUATION_OUTPUT_FIELDS = """  "total_marks": 10,
   "marks_awarded": "<number between 0 and 10>",
   "verdict": "<Excellent | Good | Average | Poor | Incorrect>",
   "conceptual_accuracy": "<brief evaluation>",
@@ -50,42 +56,202 @@ Assess the answer on:
   "missing_or_incorrect_points": "<what is missing or wrong>",
   "presentation_feedback": "<structure, clarity, step-wise comments>",
   "examiner_remarks": "<ICMAI-style concise remark>"
-}}
 """
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-    )
+
+CA_ICMAI_EVALUATION_PROMPT = EVALUATION_PREAMBLE + """
+### Question
+{question}
+
+### Student Answer
+{answer}
+""" + EVALUATION_CRITERIA + """
+### Output Format (STRICT JSON ONLY)
+{{
+""" + EVALUATION_OUTPUT_FIELDS + """}}
+"""
+
+# Changes whenever the template is edited, which invalidates cached evaluations
+PROMPT_VERSION = hashlib.sha256(CA_ICMAI_EVALUATION_PROMPT.encode()).hexdigest()[:16]
+
+EMPTY_EVALUATION = {
+    "total_marks": 10,
+    "marks_awarded": 0,
+    "verdict": "",
+    "conceptual_accuracy": "",
+    "key_points_covered": "",
+    "missing_or_incorrect_points": "",
+    "presentation_feedback": "",
+    "examiner_remarks": ""
+}
+
+
+# Where each field's value starts in the partially streamed JSON
+_FIELD_PATTERNS = {field: re.compile(rf'"{field}"\s*:\s*') for field in EMPTY_EVALUATION}
+# A number may still be growing until a delimiter follows it
+_NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?=\s*[,}\n])')
+_json_decoder = json.JSONDecoder()
+
+
+def extract_completed_fields(partial_content: str, emitted: set) -> list:
+    """
+    Scans partially streamed JSON for output fields whose value is complete
+    and not yet in `emitted`. Returns [(field, value), ...] in schema order.
+    Strings, lists and objects are complete once closed, numbers once a delimiter follows.
+    """
+    completed = []
+
+    for field, pattern in _FIELD_PATTERNS.items():
+        if field in emitted:
+            continue
+
+        match = pattern.search(partial_content)
+        if not match:
+            continue
+
+        start = match.end()
+        number = _NUMBER_PATTERN.match(partial_content, start)
+        if number:
+            completed.append((field, json.loads(number.group())))
+            continue
+        # An unfinished number, or no value streamed yet
+        if partial_content[start:start + 1] in "-0123456789":
+            continue
+
+        try:
+            value, _ = _json_decoder.raw_decode(partial_content, start)
+        except json.JSONDecodeError:
+            continue
+        completed.append((field, value))
+
+    return completed
+
+
+def parse_evaluation(content: str) -> dict:
+    """
+    Parses the LLM output into the evaluation dict.
+    Raises json.JSONDecodeError if the output is not valid JSON.
+    """
+    return evaluation_from_dict(json.loads(content))
+
+
+def evaluation_from_dict(parsed: dict) -> dict:
+    """Maps one parsed evaluation object onto the evaluation dict shape."""
+    return {
+        "total_marks": parsed.get("total_marks", 10),
+        "marks_awarded": parsed.get("marks_awarded", 0),
+        "verdict": parsed.get("verdict", ""),
+        "conceptual_accuracy": parsed.get("conceptual_accuracy", ""),
+        "key_points_covered": parsed.get("key_points_covered", ""),
+        "missing_or_incorrect_points": parsed.get("missing_or_incorrect_points", ""),
+        "presentation_feedback": parsed.get("presentation_feedback", ""),
+        "examiner_remarks": parsed.get("examiner_remarks", "")
+    }
+
+
+def _completion_kwargs(question: str, answer: str) -> dict:
+    prompt = CA_ICMAI_EVALUATION_PROMPT.format(question=question, answer=answer)
+
+    return {
+        "model": EVALUATION_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0,
+    }
+
+
+async def _evaluate(question: str, answer: str, cache_key: str) -> dict:
+    cached = await asyncio.to_thread(get_cached_evaluation, cache_key)
+    if cached is not None:
+        return cached
+
+    response = await create_chat_completion(**_completion_kwargs(question, answer))
 
     content = response.choices[0].message.content.strip()
 
-    # Validate and parse JSON
     try:
-        parsed = json.loads(content)
-
-        return {
-            "total_marks": parsed.get("total_marks", 10),
-            "marks_awarded": parsed.get("marks_awarded", 0),
-            "verdict": parsed.get("verdict", ""),
-            "conceptual_accuracy": parsed.get("conceptual_accuracy", ""),
-            "key_points_covered": parsed.get("key_points_covered", ""),
-            "missing_or_incorrect_points": parsed.get("missing_or_incorrect_points", ""),
-            "presentation_feedback": parsed.get("presentation_feedback", ""),
-            "examiner_remarks": parsed.get("examiner_remarks", "")
-        }
+        result = parse_evaluation(content)
+    except json.JSONDecodeError:
+        LLM_PARSE_FAILURES.labels("evaluation").inc()
+        return dict(EMPTY_EVALUATION)
+
+    # A fallback model's evaluation is served but not cached under EVALUATION_MODEL's key
+    if response.model == EVALUATION_MODEL:
+        await asyncio.to_thread(store_evaluation, cache_key, result, EVALUATION_MODEL)
+    return result
+
 
+async def generate_ca_icmai_evaluation_prompt_async(question: str, answer: str) -> dict:
+    """
+    Evaluates a CA answer strictly as per ICMAI / ICAI evaluation guidelines through
+    create_chat_completion, so it gets the deadlines, retries and rate limit pacing there.
+    Identical (whitespace-normalized) inputs are served from the evaluation cache,
+    and concurrent identical calls (same cache key) wait on a single evaluation.
+    """
+    cache_key = evaluation_cache_key(question, answer, PROMPT_VERSION, EVALUATION_MODEL)
+    result = await evaluation_flights.do(cache_key, lambda: _evaluate(question, answer, cache_key))
+    # Callers of a shared flight must not see each other's changes
+    return dict(result)
+
+
+async def stream_ca_icmai_evaluation(question: str, answer: str):
+    """
+    Streaming variant of generate_ca_icmai_evaluation_prompt_async.
+    Yields ("field", {"field": ..., "value": ...}) as soon as each output field
+    can be parsed from the partial completion, then ("result", <evaluation dict>).
+    """
+    cache_key = evaluation_cache_key(question, answer, PROMPT_VERSION, EVALUATION_MODEL)
+    if evaluation_flights.in_flight(cache_key):
+        # The same answer is already being evaluated without streaming; wait for it
+        cached = dict(await evaluation_flights.do(cache_key, lambda: _evaluate(question, answer, cache_key)))
+    else:
+        cached = await asyncio.to_thread(get_cached_evaluation, cache_key)
+
+    if cached is not None:
+        for field, value in cached.items():
+            yield "field", {"field": field, "value": value}
+        yield "result", cached
+        return
+
+    deadline = completion_deadline()
+    stream = await create_chat_completion(deadline, **_completion_kwargs(question, answer), stream=True)
+
+    content = ""
+    emitted = set()
+    model = EVALUATION_MODEL
+
+    async for chunk in read_stream(stream, deadline):
+        model = chunk.model or model
+
+        # Groq attaches the token usage to the final chunk
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+            observe_token_usage(model, x_groq.usage)
+            groq_rate_limits.observe_usage(model, x_groq.usage)
+
+        if not chunk.choices:
+            continue
+
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+
+        content += delta
+        for field, value in extract_completed_fields(content, emitted):
+            emitted.add(field)
+            yield "field", {"field": field, "value": value}
+
+    try:
+        result = parse_evaluation(content.strip())
     except json.JSONDecodeError:
-        # Hard fallback — prevents pipeline crash
-        return {
-    "total_marks": 10,
-            "marks_awarded": 0,
-            "verdict": "",
-            "conceptual_accuracy": "",
-            "key_points_covered": "",
-            "missing_or_incorrect_points": "",
-            "presentation_feedback": "",
-            "examiner_remarks": ""
-        }
+        LLM_PARSE_FAILURES.labels("evaluation").inc()
+        logger.warning("Streamed evaluation was not valid JSON")
+        yield "result", dict(EMPTY_EVALUATION)
+        return
 
+    # Fields the partial scan missed, or that the model left out and got their defaults
+    for field, value in result.items():
+        if field not in emitted:
+            yield "field", {"field": field, "value": value}
 
+    if model == EVALUATION_MODEL:
+        await asyncio.to_thread(store_evaluation, cache_key, result, EVALUATION_MODEL)
+    yield "result", result
@@ -0,0 +1,96 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.session import SessionLocal
+from evaluation.model import EvaluationCacheEntry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_CACHE_TTL_SECONDS = int(os.getenv("EVALUATION_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+EVALUATION_CACHE_MAX_ENTRIES = int(os.getenv("EVALUATION_CACHE_MAX_ENTRIES", 100000))
+EVALUATION_CACHE_EVICT_EVERY = int(os.getenv("EVALUATION_CACHE_EVICT_EVERY", 100))
+
+_writes_since_eviction = 0
+_eviction_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def evaluation_cache_key(question: str, answer: str, prompt_version: str, model: str) -> str:
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, normalize_text(question), normalize_text(answer)):
+        digest.update(part.encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def get_cached_evaluation(key: str):
+    """
+    Returns the cached evaluation dict, or None on a miss, an expired entry
+    or a database error. The cache must never fail an evaluation.
+    """
+    try:
+        with SessionLocal() as db:
+            return db.scalar(select(EvaluationCacheEntry.result).where(
+                EvaluationCacheEntry.key == key,
+                EvaluationCacheEntry.expires_at > datetime.now(timezone.utc)
+            ))
+    except SQLAlchemyError:
+        logger.warning("Evaluation cache lookup failed", exc_info=True)
+        return None
+
+
+def store_evaluation(key: str, result: dict, model: str):
+    global _writes_since_eviction
+
+    try:
+        with SessionLocal() as db:
+            db.merge(EvaluationCacheEntry(
+                key=key,
+                result=result,
+                model=model,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=EVALUATION_CACHE_TTL_SECONDS)
+            ))
+            db.commit()
+    except SQLAlchemyError:
+        logger.warning("Evaluation cache write failed", exc_info=True)
+        return
+
+    with _eviction_lock:
+        _writes_since_eviction += 1
+        if _writes_since_eviction < EVALUATION_CACHE_EVICT_EVERY:
+            return
+        _writes_since_eviction = 0
+
+    evict_evaluations()
+
+
+def evict_evaluations():
+    """
+    Drops expired entries, then the oldest entries beyond EVALUATION_CACHE_MAX_ENTRIES.
+    """
+    try:
+        with SessionLocal() as db:
+            db.execute(delete(EvaluationCacheEntry).where(
+                EvaluationCacheEntry.expires_at <= datetime.now(timezone.utc)
+            ))
+
+            overflow = db.scalar(select(func.count()).select_from(EvaluationCacheEntry)) - EVALUATION_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                oldest = select(EvaluationCacheEntry.key).order_by(EvaluationCacheEntry.created).limit(overflow)
+                db.execute(delete(EvaluationCacheEntry).where(EvaluationCacheEntry.key.in_(oldest)))
+
+            db.commit()
+    except SQLAlchemyError:
+        logger.warning("Evaluation cache eviction failed", exc_info=True)
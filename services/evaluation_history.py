@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from core.metrics import EVALUATION_HISTORY_RECORDS, llm_usage
+from database.session import SessionLocal
+from evaluation.model import EvaluationRecord
+from services.evaluate import EVALUATION_MODEL
+from services.evaluation_cache import normalize_text
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_HISTORY_ENABLED = os.getenv("EVALUATION_HISTORY_ENABLED", "true").lower() == "true"
+EVALUATION_HISTORY_BATCH_SIZE = int(os.getenv("EVALUATION_HISTORY_BATCH_SIZE", 100))
+EVALUATION_HISTORY_FLUSH_SECONDS = float(os.getenv("EVALUATION_HISTORY_FLUSH_SECONDS", 1))
+# Records waiting to be written; beyond this they are dropped instead of holding memory
+EVALUATION_HISTORY_QUEUE_LIMIT = int(os.getenv("EVALUATION_HISTORY_QUEUE_LIMIT", 10000))
+EVALUATION_HISTORY_STOP_TIMEOUT_SECONDS = 10
+
+_queue = None
+_writer_task = None
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_text(question).encode()).hexdigest()
+
+
+def track_llm_usage() -> dict:
+    """
+    Starts collecting the token usage of the LLM calls made from here on in the
+    current task (a request, or one batch item running in its own task).
+    """
+    usage = {}
+    llm_usage.set(usage)
+    return usage
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_evaluation(user_id: int, question: str, answer: str, result: dict, latency_seconds: float, usage: dict = None):
+    """
+    Queues an evaluation for the history table and returns straight away; the rows are
+    inserted in batches by the writer task. Never fails the request: when the writer is
+    not running or its queue is full the record is dropped.
+    """
+    if _queue is None:
+        return
+
+    usage = usage or {}
+    row = {
+        "user_id": user_id,
+        "question_hash": question_hash(question),
+        "question": question,
+        "answer": answer,
+        "result": result,
+        "verdict": result.get("verdict") or None,
+        "marks_awarded": _number(result.get("marks_awarded")),
+        "total_marks": _number(result.get("total_marks")),
+        "model": usage.get("model", EVALUATION_MODEL),
+        "latency_ms": int(latency_seconds * 1000),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "created": datetime.now(timezone.utc)
+    }
+
+    try:
+        _queue.put_nowait(row)
+    except asyncio.QueueFull:
+        EVALUATION_HISTORY_RECORDS.labels("dropped").inc()
+
+
+def _insert_records(rows: list):
+    with SessionLocal() as db:
+        db.execute(insert(EvaluationRecord), rows)
+        db.commit()
+
+
+async def _write(rows: list):
+    try:
+        await asyncio.to_thread(_insert_records, rows)
+    except Exception:
+        logger.exception(f"Writing {len(rows)} evaluation history record(s) failed")
+        EVALUATION_HISTORY_RECORDS.labels("failed").inc(len(rows))
+        return
+    EVALUATION_HISTORY_RECORDS.labels("written").inc(len(rows))
+
+
+async def _write_records(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    stopping = False
+
+    while not stopping:
+        row = await queue.get()
+        if row is None:
+            return
+
+        # Gather more rows for up to EVALUATION_HISTORY_FLUSH_SECONDS, one insert per batch
+        rows = [row]
+        flush_at = loop.time() + EVALUATION_HISTORY_FLUSH_SECONDS
+        while len(rows) < EVALUATION_HISTORY_BATCH_SIZE:
+            try:
+                row = await asyncio.wait_for(queue.get(), timeout=max(0.0, flush_at - loop.time()))
+            except TimeoutError:
+                break
+            if row is None:
+                stopping = True
+                break
+            rows.append(row)
+
+        await _write(rows)
+
+
+def start_evaluation_history():
+    global _queue, _writer_task
+
+    if not EVALUATION_HISTORY_ENABLED or _writer_task is not None:
+        return
+
+    _queue = asyncio.Queue(maxsize=EVALUATION_HISTORY_QUEUE_LIMIT)
+    _writer_task = asyncio.create_task(_write_records(_queue))
+
+
+async def stop_evaluation_history():
+    """Writes what is still queued, giving up after EVALUATION_HISTORY_STOP_TIMEOUT_SECONDS."""
+    global _queue, _writer_task
+
+    if _writer_task is None:
+        return
+
+    queue, _queue = _queue, None
+    try:
+        async with asyncio.timeout(EVALUATION_HISTORY_STOP_TIMEOUT_SECONDS):
+            await queue.put(None)
+            await _writer_task
+    except TimeoutError:
+        logger.warning(f"Evaluation history writer did not finish, {queue.qsize()} record(s) lost")
+        _writer_task.cancel()
+        await asyncio.gather(_writer_task, return_exceptions=True)
+    _writer_task = None
+
+
+def encode_cursor(record: EvaluationRecord) -> str:
+    return base64.urlsafe_b64encode(f"{record.created.isoformat()}|{record.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created, id) of the last record of the previous page; ValueError if the cursor is not ours."""
+    try:
+        created, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created), int(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def list_evaluation_records(db: Session, user_id: int, limit: int, cursor: str = None,
+                            created_from: datetime = None, created_to: datetime = None,
+                            verdict: str = None, min_marks: float = None, max_marks: float = None,
+                            question_hash: str = None) -> tuple:
+    """
+    One page of a user's evaluation history, newest first, and the cursor of the next page
+    (None on the last one). Keyset pagination on (created, id): every page is an index range
+    scan on ix_evaluation_records_user_created_id, however deep the client pages.
+    """
+    query = select(EvaluationRecord).where(EvaluationRecord.user_id == user_id)
+
+    if created_from is not None:
+        query = query.where(EvaluationRecord.created >= created_from)
+    if created_to is not None:
+        query = query.where(EvaluationRecord.created < created_to)
+    if verdict:
+        query = query.where(EvaluationRecord.verdict == verdict)
+    if min_marks is not None:
+        query = query.where(EvaluationRecord.marks_awarded >= min_marks)
+    if max_marks is not None:
+        query = query.where(EvaluationRecord.marks_awarded <= max_marks)
+    if question_hash:
+        query = query.where(EvaluationRecord.question_hash == question_hash)
+
+    if cursor:
+        created, record_id = decode_cursor(cursor)
+        query = query.where(tuple_(EvaluationRecord.created, EvaluationRecord.id) < tuple_(created, record_id))
+
+    # One extra row tells whether there is a next page
+    records = db.scalars(
+        query.order_by(EvaluationRecord.created.desc(), EvaluationRecord.id.desc()).limit(limit + 1)
+    ).all()
+
+    if len(records) > limit:
+        return records[:limit], encode_cursor(records[limit - 1])
+    return records, None
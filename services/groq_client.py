@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import math
+import os
+import time
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from groq import AsyncGroq, RateLimitError
+
+from core.global_constants import ErrorMessage
+from core.metrics import LLM_FALLBACKS, LLM_HEDGES, LLM_RETRIES, observe_token_usage, time_llm_call
+from services.groq_rate_limits import groq_rate_limits
+from services.groq_resilience import (
+    GROQ_ATTEMPT_TIMEOUT_SECONDS,
+    GROQ_DEADLINE_SECONDS,
+    circuit_breaker,
+    failure_reason,
+    fallback_models,
+    is_provider_failure,
+    latency_tracker,
+    retry_delay
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 100))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", 20))
+GROQ_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", 30))
+GROQ_CONNECT_TIMEOUT_SECONDS = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", 5))
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", 60))
+# Retries are made by create_chat_completion, not the SDK
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", 2))
+
+# Application scoped client, created once and reused so the
+# HTTP connection pool and TLS sessions survive between calls
+_async_client = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=GROQ_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(GROQ_TIMEOUT_SECONDS, connect=GROQ_CONNECT_TIMEOUT_SECONDS)
+
+
+def start_groq_client() -> AsyncGroq:
+    global _async_client
+
+    if _async_client is None:
+        _async_client = AsyncGroq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout()),
+            timeout=_timeout(),
+            max_retries=0
+        )
+    return _async_client
+
+
+async def close_groq_client():
+    global _async_client
+
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def get_async_groq_client() -> AsyncGroq:
+    # Started in the app lifespan; created lazily for scripts and workers
+    return start_groq_client()
+
+
+async def _send(kwargs: dict):
+    """One HTTP request to Groq, sent once its rate limit slot has come (see _complete_with_retries)."""
+    model = kwargs["model"]
+    started = time.perf_counter()
+    with time_llm_call(model):
+        try:
+            raw_response = await get_async_groq_client().chat.completions.with_raw_response.create(**kwargs)
+        except RateLimitError as e:
+            groq_rate_limits.observe_rate_limited(model, e.response.headers)
+            raise
+        except Exception as e:
+            if is_provider_failure(e):
+                circuit_breaker(model).record_failure()
+            raise
+
+    circuit_breaker(model).record_success()
+    if not kwargs.get("stream"):
+        latency_tracker(model).observe(time.perf_counter() - started)
+
+    groq_rate_limits.observe(model, raw_response.headers)
+    response = await raw_response.parse()
+
+    if not kwargs.get("stream"):
+        observe_token_usage(model, response.usage)
+        groq_rate_limits.observe_usage(model, response.usage)
+    return response
+
+
+async def _send_hedged(kwargs: dict):
+    """
+    Sends the request and, if it is still running past the model's observed p95,
+    a duplicate; the first good response wins and the other request is cancelled.
+    Streamed calls are not hedged.
+    """
+    model = kwargs["model"]
+    tracker = latency_tracker(model)
+    hedge_after = None if kwargs.get("stream") else tracker.hedge_delay()
+
+    primary = asyncio.ensure_future(_send(kwargs))
+    hedge = None
+    try:
+        if hedge_after is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if (
+                done
+                or circuit_breaker(model).state != circuit_breaker(model).CLOSED
+                or groq_rate_limits.is_pacing(model)
+                or not tracker.take_hedge()
+        ):
+            return await primary
+
+        # Never fired while the model is paced, so the hedge needs no rate limit slot of its own
+        LLM_HEDGES.labels(model, "fired").inc()
+        hedge = asyncio.ensure_future(_send(kwargs))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        LLM_HEDGES.labels(model, "won").inc()
+                    return task.result()
+
+        # Both failed
+        return primary.result()
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def _complete_with_retries(kwargs: dict, deadline: float):
+    """Attempts on one model until success, a non-retryable error, an open breaker or the deadline."""
+    model = kwargs["model"]
+    loop = asyncio.get_running_loop()
+    attempt = 0
+
+    while True:
+        # Paced while Groq reports little headroom left, see services/groq_rate_limits.py.
+        # Our own pacing is not a provider failure: it is bounded by the deadline only,
+        # not the attempt timeout, and running out of time here is not a breaker failure.
+        async with asyncio.timeout_at(deadline):
+            await groq_rate_limits.wait(model)
+
+        try:
+            async with asyncio.timeout_at(min(deadline, loop.time() + GROQ_ATTEMPT_TIMEOUT_SECONDS)):
+                return await _send_hedged(kwargs)
+        except Exception as e:
+            reason = failure_reason(e)
+            if reason is None:
+                raise
+            if isinstance(e, TimeoutError):
+                circuit_breaker(model).record_failure()
+
+            delay = retry_delay(attempt)
+            if attempt >= GROQ_MAX_RETRIES or loop.time() + delay >= deadline or not circuit_breaker(model).allow():
+                raise
+
+        attempt += 1
+        LLM_RETRIES.labels(model, reason).inc()
+        await asyncio.sleep(delay)
+
+
+def completion_deadline() -> float:
+    """Event loop time by which a call starting now must be done, see create_chat_completion."""
+    return asyncio.get_running_loop().time() + GROQ_DEADLINE_SECONDS
+
+
+async def read_stream(stream, deadline: float):
+    """
+    Yields the chunks of a streamed completion. Reading them is bounded by the call's
+    deadline too: the attempt timeouts only cover the wait for the response headers,
+    and a stream that stalls afterwards raises TimeoutError instead of hanging.
+    """
+    try:
+        while True:
+            # Bounded per read, so the time the consumer spends between chunks is not cut short
+            async with asyncio.timeout_at(deadline):
+                try:
+                    chunk = await anext(stream)
+                except StopAsyncIteration:
+                    return
+            yield chunk
+    finally:
+        await stream.close()
+
+
+async def create_chat_completion(deadline: float = None, **kwargs):
+    """
+    Single entry point for async chat completions so that every
+    LLM call goes through the shared, pooled client.
+    Each call has a GROQ_DEADLINE_SECONDS deadline and per attempt timeouts, is retried
+    with jittered backoff on timeouts, connection errors, 429s and 5xx, hedged past the
+    observed p95 and moved to the GROQ_FALLBACK_MODELS while the model's circuit breaker is open.
+    Callers that cache results should check `response.model`: it is the model that answered.
+    With no model available the call fails fast with 503.
+    Streamed responses report their usage in the last chunk, see stream_ca_icmai_evaluation;
+    pass the same `deadline` (see completion_deadline) to read_stream to bound reading them.
+    """
+    model = kwargs.get("model", "unknown")
+    if deadline is None:
+        deadline = completion_deadline()
+    last_error = None
+
+    for candidate in fallback_models(model):
+        if not circuit_breaker(candidate).allow():
+            continue
+
+        try:
+            response = await _complete_with_retries({**kwargs, "model": candidate}, deadline)
+        except Exception as e:
+            if failure_reason(e) is None or asyncio.get_running_loop().time() >= deadline:
+                raise
+            logger.warning(f"Groq call to {candidate} failed after retries: {failure_reason(e)}")
+            last_error = e
+            continue
+
+        if candidate != model:
+            LLM_FALLBACKS.labels(model, candidate).inc()
+        return response
+
+    if last_error is not None:
+        raise last_error
+
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=ErrorMessage.LLM_UNAVAILABLE.value,
+        headers={"Retry-After": str(math.ceil(min(circuit_breaker(candidate).retry_after() for candidate in fallback_models(model))))}
+    )
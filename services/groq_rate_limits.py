@@ -0,0 +1,153 @@
+import asyncio
+import os
+import re
+import time
+
+from dotenv import load_dotenv
+
+from core.metrics import GROQ_THROTTLE_SECONDS
+
+load_dotenv()
+
+# Below this fraction of a limit the calls are spread over what is left of the window
+GROQ_RATE_LIMIT_HEADROOM = float(os.getenv("GROQ_RATE_LIMIT_HEADROOM", 0.1))
+# A call never waits longer than this for the rate limit, it is sent and may get a 429
+GROQ_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("GROQ_RATE_LIMIT_MAX_WAIT_SECONDS", 30))
+
+# Groq reset values look like "7.66s", "2m59.56s" or "120ms"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value) -> float:
+    """Seconds in a Groq reset / Retry-After value, or None if it cannot be read."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    seconds = 0.0
+    parts = _DURATION_PART.findall(value)
+    for amount, unit in parts:
+        seconds += float(amount) * {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit]
+    return seconds if parts else None
+
+
+def _int_header(headers, name: str):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class _ModelLimits:
+    def __init__(self):
+        self.requests_limit = None
+        self.requests_remaining = None
+        self.requests_reset_at = 0.0
+        self.tokens_limit = None
+        self.tokens_remaining = None
+        self.tokens_reset_at = 0.0
+        # Set from Retry-After when Groq answered 429
+        self.blocked_until = 0.0
+        # Next send time handed out while calls are being paced
+        self.next_slot = 0.0
+        self.tokens_per_call = 1000.0
+
+
+class GroqRateLimits:
+    """
+    Tracks the x-ratelimit-* headers Groq returns per model and paces calls before the
+    remaining requests or tokens run out, instead of waiting for 429s. Event loop only.
+    """
+
+    def __init__(self):
+        self._models = {}
+
+    def _limits(self, model: str) -> _ModelLimits:
+        limits = self._models.get(model)
+        if limits is None:
+            limits = self._models[model] = _ModelLimits()
+        return limits
+
+    def observe(self, model: str, headers):
+        limits = self._limits(model)
+        now = time.monotonic()
+
+        requests_remaining = _int_header(headers, "x-ratelimit-remaining-requests")
+        if requests_remaining is not None:
+            limits.requests_limit = _int_header(headers, "x-ratelimit-limit-requests")
+            limits.requests_remaining = requests_remaining
+            limits.requests_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0)
+
+        tokens_remaining = _int_header(headers, "x-ratelimit-remaining-tokens")
+        if tokens_remaining is not None:
+            limits.tokens_limit = _int_header(headers, "x-ratelimit-limit-tokens")
+            limits.tokens_remaining = tokens_remaining
+            limits.tokens_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0)
+
+    def observe_rate_limited(self, model: str, headers):
+        retry_after = parse_duration(headers.get("retry-after")) if headers is not None else None
+        limits = self._limits(model)
+        limits.blocked_until = max(limits.blocked_until, time.monotonic() + (retry_after or 1.0))
+
+    def observe_usage(self, model: str, usage):
+        if usage is not None and getattr(usage, "total_tokens", None):
+            limits = self._limits(model)
+            limits.tokens_per_call = 0.9 * limits.tokens_per_call + 0.1 * usage.total_tokens
+
+    def _interval(self, limits: _ModelLimits, now: float) -> float:
+        """Spacing between calls so the remaining budget lasts until the window resets."""
+        interval = 0.0
+
+        if limits.requests_limit and limits.requests_remaining is not None and limits.requests_reset_at > now:
+            if limits.requests_remaining < limits.requests_limit * GROQ_RATE_LIMIT_HEADROOM:
+                interval = max(interval, (limits.requests_reset_at - now) / max(limits.requests_remaining, 1))
+
+        if limits.tokens_limit and limits.tokens_remaining is not None and limits.tokens_reset_at > now:
+            if limits.tokens_remaining < limits.tokens_limit * GROQ_RATE_LIMIT_HEADROOM:
+                calls_left = limits.tokens_remaining / limits.tokens_per_call
+                interval = max(interval, (limits.tokens_reset_at - now) / max(calls_left, 1))
+
+        return interval
+
+    def reserve(self, model: str) -> float:
+        """Reserves the next send slot for `model` and returns how long to wait for it."""
+        limits = self._models.get(model)
+        if limits is None:
+            return 0.0
+
+        now = time.monotonic()
+        interval = self._interval(limits, now)
+        if interval == 0 and limits.blocked_until <= now and limits.next_slot <= now:
+            return 0.0
+
+        slot = min(max(now, limits.next_slot, limits.blocked_until), now + GROQ_RATE_LIMIT_MAX_WAIT_SECONDS)
+        limits.next_slot = slot + interval
+        return slot - now
+
+    def is_pacing(self, model: str) -> bool:
+        """True while calls to `model` are being spread out or held back."""
+        limits = self._models.get(model)
+        if limits is None:
+            return False
+        now = time.monotonic()
+        return limits.blocked_until > now or limits.next_slot > now or self._interval(limits, now) > 0
+
+    def max_delay(self) -> float:
+        """How long a call arriving now would wait for its slot, on the most constrained model."""
+        now = time.monotonic()
+        return max(
+            (max(limits.blocked_until, limits.next_slot) - now for limits in self._models.values()),
+            default=0.0
+        )
+
+    async def wait(self, model: str):
+        delay = self.reserve(model)
+        if delay > 0:
+            GROQ_THROTTLE_SECONDS.labels(model).inc(delay)
+            await asyncio.sleep(delay)
+
+
+groq_rate_limits = GroqRateLimits()
@@ -0,0 +1,165 @@
+import os
+import random
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+from groq import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+from core.metrics import LLM_CIRCUIT_OPEN
+
+load_dotenv()
+
+# Whole call, retries and fallback models included
+GROQ_DEADLINE_SECONDS = float(os.getenv("GROQ_DEADLINE_SECONDS", 60))
+# One attempt (until the response headers for streamed calls, whose body is bounded by the deadline)
+GROQ_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("GROQ_ATTEMPT_TIMEOUT_SECONDS", 30))
+GROQ_RETRY_BASE_SECONDS = float(os.getenv("GROQ_RETRY_BASE_SECONDS", 0.5))
+GROQ_RETRY_MAX_SECONDS = float(os.getenv("GROQ_RETRY_MAX_SECONDS", 8))
+
+# At most this fraction of calls gets a hedge (duplicate) request; 0 turns hedging off
+GROQ_HEDGE_MAX_RATIO = float(os.getenv("GROQ_HEDGE_MAX_RATIO", 0.05))
+GROQ_HEDGE_MIN_SECONDS = float(os.getenv("GROQ_HEDGE_MIN_SECONDS", 1))
+GROQ_HEDGE_MIN_SAMPLES = 20
+GROQ_LATENCY_WINDOW = 200
+
+GROQ_BREAKER_FAILURES = int(os.getenv("GROQ_BREAKER_FAILURES", 5))
+GROQ_BREAKER_RESET_SECONDS = float(os.getenv("GROQ_BREAKER_RESET_SECONDS", 30))
+
+# Tried in order when the requested model is failing or its breaker is open
+GROQ_FALLBACK_MODELS = [model.strip() for model in os.getenv("GROQ_FALLBACK_MODELS", "").split(",") if model.strip()]
+
+
+def failure_reason(error: BaseException):
+    """Why a Groq call failed, if it is worth retrying: timeout, connection, rate_limited or server_error."""
+    if isinstance(error, (TimeoutError, APITimeoutError)):
+        return "timeout"
+    if isinstance(error, APIConnectionError):
+        return "connection"
+    if isinstance(error, RateLimitError):
+        return "rate_limited"
+    if isinstance(error, APIStatusError) and error.status_code >= 500:
+        return "server_error"
+    return None
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Failures that say Groq is degraded; 429s are handled by the rate limit pacing instead."""
+    return failure_reason(error) in ("timeout", "connection", "server_error")
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff, jittered between 50% and 100% of the step."""
+    ceiling = min(GROQ_RETRY_MAX_SECONDS, GROQ_RETRY_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def fallback_models(model: str) -> list:
+    return [model] + [fallback for fallback in GROQ_FALLBACK_MODELS if fallback != model]
+
+
+class CircuitBreaker:
+    """
+    Opens after GROQ_BREAKER_FAILURES provider failures in a row, so calls fail fast
+    (or go to a fallback model) instead of waiting for their timeouts. After
+    GROQ_BREAKER_RESET_SECONDS one probe call is let through; its success closes the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, model: str):
+        self.model = model
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < GROQ_BREAKER_RESET_SECONDS:
+                return False
+            self.state = self.HALF_OPEN
+            self.probe_started = None
+
+        # A probe that was cancelled never reports back, let another one through
+        if self.probe_started is None or now - self.probe_started > GROQ_ATTEMPT_TIMEOUT_SECONDS:
+            self.probe_started = now
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 1.0
+        return max(1.0, GROQ_BREAKER_RESET_SECONDS - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            LLM_CIRCUIT_OPEN.labels(self.model).set(0)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= GROQ_BREAKER_FAILURES:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.probe_started = None
+            LLM_CIRCUIT_OPEN.labels(self.model).set(1)
+
+
+class LatencyTracker:
+    """
+    Recent latencies of one model, to decide when a slow call gets hedged.
+    Every call earns GROQ_HEDGE_MAX_RATIO of a hedge, so a slow provider
+    cannot make hedging double the load on it.
+    """
+
+    def __init__(self):
+        self._samples = deque(maxlen=GROQ_LATENCY_WINDOW)
+        self._p95 = None
+        self._hedge_credit = 0.0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        # Sorting on every call is wasted work; the p95 moves slowly
+        if len(self._samples) >= GROQ_HEDGE_MIN_SAMPLES and (self._p95 is None or len(self._samples) % 10 == 0):
+            ordered = sorted(self._samples)
+            self._p95 = ordered[int(len(ordered) * 0.95) - 1]
+
+    def hedge_delay(self):
+        """Seconds after which the call gets a hedge request, or None if it should not be hedged."""
+        if GROQ_HEDGE_MAX_RATIO <= 0 or self._p95 is None:
+            return None
+        self._hedge_credit = min(10.0, self._hedge_credit + GROQ_HEDGE_MAX_RATIO)
+        return max(self._p95, GROQ_HEDGE_MIN_SECONDS)
+
+    def take_hedge(self) -> bool:
+        if self._hedge_credit >= 1:
+            self._hedge_credit -= 1
+            return True
+        return False
+
+
+_breakers = {}
+_latencies = {}
+
+
+def circuit_breaker(model: str) -> CircuitBreaker:
+    breaker = _breakers.get(model)
+    if breaker is None:
+        breaker = _breakers[model] = CircuitBreaker(model)
+    return breaker
+
+
+def latency_tracker(model: str) -> LatencyTracker:
+    tracker = _latencies.get(model)
+    if tracker is None:
+        tracker = _latencies[model] = LatencyTracker()
+    return tracker
@@ -1,16 +1,19 @@
+import hashlib
 import json
-import os
 
 from dotenv import load_dotenv
-from groq import Groq
+
+from core.metrics import LLM_PARSE_FAILURES
+from core.singleflight import SingleFlight
+from services.groq_client import create_chat_completion
 
 load_dotenv()
 
+QUESTION_ANSWER_MODEL = "openai/gpt-oss-20b"
 
-def detect_question_answer(text: str):
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+question_answer_flights = SingleFlight("question_answer")
 
-    prompt = f"""
+QUESTION_ANSWER_EXTRACTION_PROMPT = """
 You are an information extraction assistant.
 
 Your task is to read the input text and:
@@ -73,15 +76,17 @@ Output:
 """
 
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-    )
+def _completion_kwargs(text: str) -> dict:
+    prompt = QUESTION_ANSWER_EXTRACTION_PROMPT.format(text=text)
 
+    return {
+        "model": QUESTION_ANSWER_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0,
+    }
 
-    content = response.choices[0].message.content.strip()
 
+def parse_question_answer(content: str) -> dict:
     # Validate and parse JSON
     try:
         parsed = json.loads(content)
@@ -91,7 +96,23 @@ Output:
         }
     except json.JSONDecodeError:
         # Hard fallback to safe empty output
+        LLM_PARSE_FAILURES.labels("question_answer").inc()
         return {
             "question": "",
             "answer": ""
         }
+
+
+async def _detect_question_answer(text: str) -> dict:
+    response = await create_chat_completion(**_completion_kwargs(text))
+
+    content = response.choices[0].message.content.strip()
+
+    return parse_question_answer(content)
+
+
+async def detect_question_answer_async(text: str):
+    # Concurrent calls for the same text share one Groq call
+    key = hashlib.sha256(f"{QUESTION_ANSWER_MODEL}\x00{text}".encode()).hexdigest()
+    result = await question_answer_flights.do(key, lambda: _detect_question_answer(text))
+    return dict(result)
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import textwrap
+
+from dotenv import load_dotenv
+
+from core.metrics import LLM_PARSE_FAILURES, PACKED_EVALUATION_ITEMS
+from services.evaluate import (
+    EMPTY_EVALUATION,
+    EVALUATION_CRITERIA,
+    EVALUATION_MODEL,
+    EVALUATION_OUTPUT_FIELDS,
+    EVALUATION_PREAMBLE,
+    evaluation_from_dict,
+    generate_ca_icmai_evaluation_prompt_async
+)
+from services.evaluation_cache import evaluation_cache_key, get_cached_evaluation, store_evaluation
+from services.groq_client import create_chat_completion
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PACKED_EVALUATION_PROMPT = EVALUATION_PREAMBLE + """
+Several students answered the same question. Evaluate every answer on its own,
+exactly as if it were the only one; never compare the answers with each other.
+
+### Question
+{question}
+
+### Student Answers
+{answers}
+""" + EVALUATION_CRITERIA + """
+### Output Format (STRICT JSON ONLY)
+A JSON array with exactly one object per answer, in the order given, each with the answer's id:
+[
+  {{
+    "id": "<answer id>",
+""" + textwrap.indent(EVALUATION_OUTPUT_FIELDS, "  ") + """  }}
+]
+"""
+
+PACKED_PROMPT_VERSION = hashlib.sha256(PACKED_EVALUATION_PROMPT.encode()).hexdigest()[:16]
+
+# Rough token estimates for English text; only used to size the packs
+TOKENS_PER_WORD = 1.4
+OUTPUT_TOKENS_PER_EVALUATION = 350
+# The <answer id="..."> wrapper around each answer
+ANSWER_WRAPPER_TOKENS = 12
+
+MAX_QUESTION_WORDS = int(os.getenv("MAX_QUESTION_WORDS") or 300)
+MAX_ANSWER_WORDS = int(os.getenv("MAX_ANSWER_WORDS") or 700)
+
+
+def estimate_tokens(words: int) -> int:
+    return int(words * TOKENS_PER_WORD) + 1
+
+
+_PROMPT_TOKENS = estimate_tokens(len(PACKED_EVALUATION_PROMPT.split()))
+
+# By default a packed completion (prompt + output) is no larger than the largest
+# single evaluation the word limits allow, so packing only fills the room short answers leave
+EVALUATION_PACK_TOKEN_BUDGET = int(
+    os.getenv("EVALUATION_PACK_TOKEN_BUDGET")
+    or _PROMPT_TOKENS + estimate_tokens(MAX_QUESTION_WORDS + MAX_ANSWER_WORDS) + OUTPUT_TOKENS_PER_EVALUATION
+)
+EVALUATION_PACK_MAX_ANSWERS = int(os.getenv("EVALUATION_PACK_MAX_ANSWERS", 8))
+
+
+def plan_packs(question: str, answers: list) -> list:
+    """
+    Splits answer indexes into packs, in order: each pack takes answers until the next
+    one would push the estimated prompt + output tokens over EVALUATION_PACK_TOKEN_BUDGET,
+    or it holds EVALUATION_PACK_MAX_ANSWERS. An answer too long to share a pack gets its own.
+    """
+    available = EVALUATION_PACK_TOKEN_BUDGET - _PROMPT_TOKENS - estimate_tokens(len(question.split()))
+
+    packs = []
+    current = []
+    used = 0
+    for index, answer in enumerate(answers):
+        cost = estimate_tokens(len(answer.split())) + ANSWER_WRAPPER_TOKENS + OUTPUT_TOKENS_PER_EVALUATION
+        if current and (used + cost > available or len(current) >= EVALUATION_PACK_MAX_ANSWERS):
+            packs.append(current)
+            current = []
+            used = 0
+        current.append(index)
+        used += cost
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _is_valid_item(item: dict) -> bool:
+    if not all(field in item for field in EMPTY_EVALUATION):
+        return False
+    try:
+        marks = float(item["marks_awarded"])
+        total = float(item["total_marks"])
+    except (TypeError, ValueError):
+        return False
+    return 0 <= marks <= total
+
+
+def parse_packed_evaluations(content: str, answer_ids: list) -> list:
+    """
+    Splits a packed completion into evaluation dicts aligned with `answer_ids`.
+    Entries are None where the item is missing, repeated or malformed; the whole
+    list is None-filled if the output is not a JSON array.
+    """
+    results = [None] * len(answer_ids)
+
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        LLM_PARSE_FAILURES.labels("packed_evaluation").inc()
+        return results
+
+    if not isinstance(parsed, list):
+        LLM_PARSE_FAILURES.labels("packed_evaluation").inc()
+        return results
+
+    positions = {answer_id: position for position, answer_id in enumerate(answer_ids)}
+    seen = set()
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+
+        answer_id = str(item.get("id"))
+        position = positions.get(answer_id)
+        if position is None:
+            continue
+
+        if answer_id in seen:
+            # Two evaluations for one id: neither can be trusted
+            results[position] = None
+            continue
+        seen.add(answer_id)
+
+        if _is_valid_item(item):
+            results[position] = evaluation_from_dict(item)
+
+    return results
+
+
+async def _evaluate_pack(question: str, answers: list) -> tuple:
+    # Short positional ids: the client's ids never reach the prompt
+    answer_ids = [f"A{number}" for number in range(1, len(answers) + 1)]
+    prompt = PACKED_EVALUATION_PROMPT.format(
+        question=question,
+        answers="\n\n".join(
+            f'<answer id="{answer_id}">\n{answer}\n</answer>' for answer_id, answer in zip(answer_ids, answers)
+        )
+    )
+
+    response = await create_chat_completion(
+        model=EVALUATION_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0
+    )
+
+    evaluations = parse_packed_evaluations(response.choices[0].message.content.strip(), answer_ids)
+    # Only EVALUATION_MODEL's evaluations are cached, not a fallback model's
+    return evaluations, response.model == EVALUATION_MODEL
+
+
+def _store_evaluations(evaluations: dict):
+    for key, result in evaluations.items():
+        store_evaluation(key, result, EVALUATION_MODEL)
+
+
+async def evaluate_answers_packed(question: str, answers: list, concurrency: int) -> list:
+    """
+    Evaluates several answers to one question, packing as many answers per completion
+    as the token budget allows. Items the packed output does not cover validly, and all
+    items of a pack whose completion failed, are re-run on their own through
+    generate_ca_icmai_evaluation_prompt_async.
+    Returns one entry per answer, in order: its evaluation dict, or the exception that failed it.
+    """
+    keys = [evaluation_cache_key(question, answer, PACKED_PROMPT_VERSION, EVALUATION_MODEL) for answer in answers]
+    results = list(await asyncio.gather(*(asyncio.to_thread(get_cached_evaluation, key) for key in keys)))
+    missing = [index for index, result in enumerate(results) if result is None]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def evaluate_single(index: int):
+        try:
+            async with semaphore:
+                results[index] = await generate_ca_icmai_evaluation_prompt_async(question, answers[index])
+        except Exception as e:
+            logger.exception(f"Evaluation failed for answer {index}")
+            results[index] = e
+
+    async def evaluate_pack(pack: list):
+        if len(pack) == 1:
+            # Nothing to share the preamble with, the regular prompt (and its cache) does better
+            await evaluate_single(pack[0])
+            return
+
+        try:
+            async with semaphore:
+                evaluations, cacheable = await _evaluate_pack(question, [answers[index] for index in pack])
+        except Exception:
+            # A bad packed completion must not fail every answer in it, each is re-run on its own
+            logger.exception(f"Packed evaluation of {len(pack)} answers failed, evaluating them one by one")
+            PACKED_EVALUATION_ITEMS.labels("rerun").inc(len(pack))
+            await asyncio.gather(*(evaluate_single(index) for index in pack))
+            return
+
+        reruns = []
+        for index, evaluation in zip(pack, evaluations):
+            if evaluation is None:
+                reruns.append(index)
+            else:
+                results[index] = evaluation
+
+        PACKED_EVALUATION_ITEMS.labels("packed").inc(len(pack) - len(reruns))
+        PACKED_EVALUATION_ITEMS.labels("rerun").inc(len(reruns))
+
+        cached = {keys[index]: results[index] for index in pack if index not in reruns} if cacheable else {}
+        await asyncio.gather(
+            asyncio.to_thread(_store_evaluations, cached),
+            *(evaluate_single(index) for index in reruns)
+        )
+
+    packs = plan_packs(question, [answers[index] for index in missing])
+    await asyncio.gather(*(evaluate_pack([missing[position] for position in pack]) for pack in packs))
+    return results
@@ -0,0 +1,32 @@
+import pytest
+
+import ocr.ocr_cache as ocr_cache_module
+from ocr.ocr_cache import OcrResultCache
+
+CONTENT_SHA256 = "0" * 64
+
+
+def _make_key(tmp_path) -> str:
+    return OcrResultCache(str(tmp_path), memory_entries=8, max_disk_bytes=1024).make_key(CONTENT_SHA256)
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("OCR_LANG", "fr"),
+    ("OCR_USE_ANGLE_CLS", not ocr_cache_module.OCR_USE_ANGLE_CLS),
+    ("OCR_PDF_DPI", ocr_cache_module.OCR_PDF_DPI + 100),
+    ("OCR_MAX_SIDE", ocr_cache_module.OCR_MAX_SIDE + 1),
+    ("OCR_MAX_PIXELS", ocr_cache_module.OCR_MAX_PIXELS + 1),
+    ("OCR_GRAYSCALE", not ocr_cache_module.OCR_GRAYSCALE),
+    ("OCR_DESKEW", not ocr_cache_module.OCR_DESKEW),
+    ("OCR_DESKEW_MAX_ANGLE", ocr_cache_module.OCR_DESKEW_MAX_ANGLE + 1),
+])
+def test_changing_an_ocr_setting_changes_the_key(tmp_path, monkeypatch, setting, value):
+    key = _make_key(tmp_path)
+
+    monkeypatch.setattr(ocr_cache_module, setting, value)
+
+    assert _make_key(tmp_path) != key
+
+
+def test_same_settings_give_the_same_key(tmp_path):
+    assert _make_key(tmp_path) == _make_key(tmp_path)